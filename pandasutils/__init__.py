@@ -1,5 +1,44 @@
-from .enum import Enum
-from .log import Log, logger
-from .timeformat import TimeFormat
-from .timeframestr import TimeFrameStr
-from .type import DatetimeType, SequenceGenericType, SequenceType, TimedeltaType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .enum import Enum
+    from .log import Log, logger
+    from .timeformat import TimeFormat
+    from .timeframestr import TimeFrameStr
+    from .type import (
+        DatetimeType,
+        SequenceGenericType,
+        SequenceType,
+        TimedeltaType,
+    )
+
+# 导出的名字 -> 所在的子模块。第一次访问时才导入子模块，
+# 只用 pathutil、jsonserializer 等模块时不会导入 pandas，也不会创建全局 logger。
+_EXPORTS = {
+    "Enum": "enum",
+    "Log": "log",
+    "logger": "log",
+    "TimeFormat": "timeformat",
+    "TimeFrameStr": "timeframestr",
+    "DatetimeType": "type",
+    "SequenceGenericType": "type",
+    "SequenceType": "type",
+    "TimedeltaType": "type",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_EXPORTS})
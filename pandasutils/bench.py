@@ -0,0 +1,424 @@
+"""
+性能基准测试，用于在升级前发现性能回退。
+
+    python -m pandasutils.bench --sizes 1e3 1e5 1e6 --tz UTC none -o new.json
+    python -m pandasutils.bench --compare old.json new.json
+
+数据由固定种子生成，同样的参数每次生成同样的数据。结果写入 JSON，
+包含版本、环境信息和每个用例的耗时，--compare 按用例输出两次结果的耗时比值。
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from . import dfutil, pathutil, timeutil
+
+SEED = 20240101
+START = "2024-01-01"
+# 只能逐个调用的用例(解析字符串、遍历文件)最多处理的行数
+SCALAR_LIMIT = 100_000
+FILE_LIMIT = 10_000
+
+
+def _timestamps(
+    n: int,
+    step: pd.Timedelta,
+    rng: np.random.Generator,
+    tz: str | None,
+    gap_prob: float,
+    max_gap: int,
+) -> pd.DatetimeIndex:
+    """从 START 开始以 step 递增，每一步以 gap_prob 的概率跳过 1~max_gap 个 step"""
+    steps = np.ones(n, dtype=np.int64)
+    steps[0] = 0
+    if gap_prob > 0:
+        gaps = rng.random(n) < gap_prob
+        steps[gaps] += rng.integers(1, max_gap + 1, int(gaps.sum()))
+    offsets = np.cumsum(steps) * step.value
+    times = pd.DatetimeIndex(pd.Timestamp(START).value + offsets, name="date")
+    return times if tz is None else times.tz_localize("UTC").tz_convert(tz)
+
+
+def make_ticks(
+    n: int,
+    seed: int = SEED,
+    tz: str | None = "UTC",
+    gap_prob: float = 0.01,
+    step: str = "100ms",
+) -> pd.DataFrame:
+    """
+    生成 n 条逐笔成交，列为 date、price、volume、side，date 递增且有随机间隔。
+    """
+    rng = np.random.default_rng(seed)
+    date = _timestamps(n, pd.Timedelta(step), rng, tz, gap_prob, max_gap=600)
+    price = 100 * np.exp(np.cumsum(rng.normal(0, 1e-4, n)))
+    return pd.DataFrame(
+        {
+            "date": date,
+            "price": price.round(2),
+            "volume": rng.integers(1, 1000, n),
+            "side": rng.integers(0, 2, n).astype(np.int8),
+        }
+    )
+
+
+def make_ohlcv(
+    n: int,
+    seed: int = SEED,
+    tz: str | None = "UTC",
+    gap_prob: float = 0.01,
+    freq: str = "1min",
+) -> pd.DataFrame:
+    """
+    生成 n 根 K 线，列为 date、open、high、low、close、volume，
+    date 对齐到 freq，以 gap_prob 的概率缺失若干根 K 线。
+    """
+    rng = np.random.default_rng(seed)
+    date = _timestamps(n, pd.Timedelta(freq), rng, tz, gap_prob, max_gap=30)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 1e-3, n)) * close
+    return pd.DataFrame(
+        {
+            "date": date,
+            "open": open_,
+            "high": np.maximum(open_, close) + spread,
+            "low": np.minimum(open_, close) - spread,
+            "close": close,
+            "volume": rng.integers(0, 10_000, n).astype(np.float64),
+        }
+    )
+
+
+class Case(NamedTuple):
+    """
+    setup(n, tz, workdir) 返回传给 run 的参数和实际处理的行数，setup 不计入耗时。
+    sized 为 False 的用例与数据量、时区无关，只运行一次，size 记为 0。
+    """
+
+    name: str
+    setup: Callable[[int, str | None, Path], tuple[tuple, int]]
+    run: Callable
+    sized: bool = True
+
+
+def _search_timeidx(n, tz, workdir):
+    df = make_ticks(n, tz=tz)
+    return (df["date"].iloc[n // 2], df, "date"), n
+
+
+def _shift(n, tz, workdir):
+    return (make_ohlcv(n, tz=tz), ["close", "volume"], 1), n
+
+
+def _resample(n, tz, workdir):
+    df = make_ohlcv(n, tz=tz).set_index("date")
+    spec = (
+        (["open"], "first"),
+        (["high"], "max"),
+        (["low"], "min"),
+        (["close"], "last"),
+        (["volume"], "sum"),
+    )
+    return (df, "5min", *spec), n
+
+
+def _combinefirst_bytime(n, tz, workdir):
+    df = make_ohlcv(n, tz=tz)
+    # 两段各占 2/3，中间 1/3 重叠
+    return ("date", df.iloc[: 2 * n // 3].copy(), df.iloc[n // 3 :].copy()), n
+
+
+def _run_combinefirst_bytime(key: str, df1: pd.DataFrame, df2: pd.DataFrame):
+    # combinefirst_bytime 会原地把 key 列转为 UTC，每次调用传入副本，
+    # 否则第一次之后 tz=None 的用例测的其实是 UTC 数据。耗时包含两次 copy
+    return dfutil.combinefirst_bytime(key, df1.copy(), df2.copy())
+
+
+def _readpd(fmt: str):
+    def setup(n, tz, workdir):
+        path = workdir / f"read_{n}_{tz}.{fmt}"
+        if not path.exists():
+            dfutil.writepd(make_ohlcv(n, tz=tz), path, index=False)
+        return (path,), n
+
+    return setup
+
+
+def _writepd(fmt: str):
+    def setup(n, tz, workdir):
+        return (make_ohlcv(n, tz=tz), workdir / f"write.{fmt}", False), n
+
+    return setup
+
+
+def _to_tz(n, tz, workdir):
+    return (pd.DatetimeIndex(make_ohlcv(n, tz=tz)["date"]), "Asia/Shanghai"), n
+
+
+def _complete_timeindex(n, tz, workdir):
+    return (make_ohlcv(n, tz=tz).set_index("date"), "1min"), n
+
+
+def _parse_iso8601str(n, tz, workdir):
+    n = min(n, SCALAR_LIMIT)
+    # tz=None 时生成不带时区偏移的字符串
+    date = make_ticks(n, tz=tz)["date"]
+    return (date.map(pd.Timestamp.isoformat).tolist(),), n
+
+
+def _run_parse_iso8601str(strings: list[str]):
+    parse = timeutil.parse_iso8601str
+    for s in strings:
+        parse(s)
+
+
+def _get_paths(n, tz, workdir):
+    n = min(n, FILE_LIMIT)
+    root = workdir / f"tree_{n}"
+    if not root.exists():
+        # 每个目录 100 个文件，每 10 个目录一层
+        for i in range(n):
+            folder = root.joinpath(*(f"d{i // 100 // 10**k % 10}" for k in range(3)))
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / f"f{i}.csv").touch()
+    return (root,), n
+
+
+# 导入耗时用例: 每次在新的解释器中导入，包含解释器启动的时间，
+# 对比 "python" 用例(只启动解释器)即可得到导入本身的耗时
+IMPORT_MODULES = (
+    None,
+    "pandasutils",
+    "pandasutils.pathutil",
+    "pandasutils.jsonserializer",
+    "pandasutils.timeformat",
+    "pandasutils.dfutil",
+)
+
+
+def _import_setup(module: str | None):
+    def setup(n, tz, workdir):
+        return (module,), 1
+
+    return setup
+
+
+def _run_import(module: str | None):
+    code = "pass" if module is None else f"import {module}"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+CASES: list[Case] = [
+    Case("dfutil.search_timeidx", _search_timeidx, dfutil.search_timeidx),
+    Case("dfutil.shift", _shift, dfutil.shift),
+    Case("dfutil.resample", _resample, dfutil.resample),
+    Case("dfutil.combinefirst_bytime", _combinefirst_bytime, _run_combinefirst_bytime),
+    *(
+        Case(f"dfutil.{op}[{fmt}]", setup(fmt), func)
+        for fmt in ("csv", "parquet", "feather")
+        for op, setup, func in (
+            ("writepd", _writepd, dfutil.writepd),
+            ("readpd", _readpd, dfutil.readpd),
+        )
+    ),
+    Case("timeutil.to_tz", _to_tz, timeutil.to_tz),
+    Case(
+        "timeutil.complete_timeindex", _complete_timeindex, timeutil.complete_timeindex
+    ),
+    Case("timeutil.parse_iso8601str", _parse_iso8601str, _run_parse_iso8601str),
+    Case("pathutil.get_paths", _get_paths, pathutil.get_paths),
+    *(
+        Case(f"import[{module or 'python'}]", _import_setup(module), _run_import, False)
+        for module in IMPORT_MODULES
+    ),
+]
+
+
+def _measure(func: Callable, args: tuple, repeat: int, min_time: float) -> dict:
+    """
+    与 timeit 相同：先确定每轮调用次数 number 使一轮不少于 min_time 秒，
+    再重复 repeat 轮，返回每次调用的耗时统计。
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func(*args)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func(*args)
+        times.append((time.perf_counter() - start) / number)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+    }
+
+
+def _environment() -> dict:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        pkg_version = version("pandasutils")
+    except PackageNotFoundError:
+        pkg_version = "unknown"
+    try:
+        import pyarrow
+
+        arrow_version = pyarrow.__version__
+    except ImportError:
+        arrow_version = None
+    return {
+        "pandasutils": pkg_version,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": arrow_version,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "seed": SEED,
+        "created": pd.Timestamp.now(tz="UTC").isoformat(),
+    }
+
+
+def run(
+    sizes: Sequence[int] = (1_000, 10_000, 100_000),
+    tzs: Sequence[str | None] = ("UTC", None),
+    select: str | None = None,
+    repeat: int = 5,
+    min_time: float = 0.2,
+    workdir: Path | None = None,
+    verbose: bool = True,
+) -> dict:
+    """
+    运行名称包含 select 的用例，返回 {"environment": ..., "results": [...]}。
+    workdir 为读写文件用例的临时目录，默认新建并在结束后删除。
+    """
+    cases = [c for c in CASES if select is None or select in c.name]
+    owns_workdir = workdir is None
+    workdir = (
+        Path(tempfile.mkdtemp(prefix="pandasutils-bench-")) if owns_workdir else workdir
+    )
+    results = []
+    try:
+        for case in cases:
+            for n in sizes if case.sized else (0,):
+                for tz in tzs if case.sized else (None,):
+                    args, rows = case.setup(n, tz, workdir)
+                    stats = _measure(case.run, args, repeat, min_time)
+                    result = {
+                        "case": case.name,
+                        "size": n,
+                        "tz": tz,
+                        "rows": rows,
+                        **stats,
+                        "rows_per_s": rows / stats["min_s"] if stats["min_s"] else None,
+                    }
+                    results.append(result)
+                    if verbose:
+                        print(
+                            f"{case.name:<34} n={n:<10} tz={str(tz):<6} "
+                            f"min={stats['min_s'] * 1e3:10.3f} ms "
+                            f"median={stats['median_s'] * 1e3:10.3f} ms",
+                            flush=True,
+                        )
+                    del args
+    finally:
+        if owns_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {"environment": _environment(), "results": results}
+
+
+def _key(result: dict) -> tuple:
+    return result["case"], result["size"], result["tz"]
+
+
+def compare(old: dict, new: dict) -> pd.DataFrame:
+    """
+    按 (用例, 数据量, 时区) 对比两次结果的最小耗时，ratio = new / old，大于 1 为变慢。
+    """
+    old_times = {_key(r): r["min_s"] for r in old["results"]}
+    rows = [
+        (*_key(r), old_times[_key(r)], r["min_s"], r["min_s"] / old_times[_key(r)])
+        for r in new["results"]
+        if _key(r) in old_times and old_times[_key(r)] > 0
+    ]
+    df = pd.DataFrame(rows, columns=["case", "size", "tz", "old_s", "new_s", "ratio"])
+    df["tz"] = df["tz"].fillna("none")
+    return df.sort_values("ratio", ascending=False, ignore_index=True)
+
+
+def _tz_arg(value: str) -> str | None:
+    return None if value.lower() in ("none", "naive") else value
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pandasutils.bench", description="pandasutils 性能基准测试"
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=lambda s: int(float(s)),
+        default=[1_000, 10_000, 100_000],
+        help="数据行数，可以写成 1e6，默认 1e3 1e4 1e5",
+    )
+    parser.add_argument(
+        "--tz",
+        nargs="+",
+        type=_tz_arg,
+        default=["UTC", None],
+        help="时区，none 表示不带时区，默认 UTC none",
+    )
+    parser.add_argument("-k", "--select", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="每轮最少秒数")
+    parser.add_argument("-o", "--output", type=Path, help="结果 JSON 路径")
+    parser.add_argument(
+        "--compare", nargs=2, type=Path, metavar=("OLD", "NEW"), help="对比两个结果"
+    )
+    parser.add_argument("--list", action="store_true", help="列出所有用例")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(c.name for c in CASES))
+        return
+    if args.compare:
+        old, new = (json.loads(p.read_text()) for p in args.compare)
+        print(compare(old, new).to_string(float_format="%.6g"))
+        return
+
+    result = run(args.sizes, args.tz, args.select, args.repeat, args.min_time)
+    text = json.dumps(result, indent=2)
+    if args.output is None:
+        sys.stdout.write(text + "\n")
+    else:
+        args.output.write_text(text)
+
+
+if __name__ == "__main__":
+    main()
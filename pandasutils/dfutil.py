@@ -1,8 +1,10 @@
+import shutil
 from collections.abc import Callable, Sequence
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Literal, cast
 
+import numpy as np
 import pandas as pd
 
 
@@ -185,7 +187,439 @@ def resample(
     return df
 
 
+AggSpec = dict[str, method | Callable[[pd.Series], object]]
+
+
+def dedupe_bytime(
+    df: pd.DataFrame,
+    key: str,
+    keep: Literal["first", "last"] | AggSpec = "last",
+) -> tuple[pd.DataFrame, int]:
+    """
+    按时间列(或索引) key 去除重复时间的行，结果按时间升序排列。
+
+    参数:
+    - key: 时间列名或索引名。
+    - keep: "first" / "last" 保留同一时间的第一行 / 最后一行(按原来的顺序)；
+      或 {列名: 聚合方法} 对同一时间的行聚合，聚合方法与 resample 相同，
+      也可以是函数，未列出的列取最后一行的值。
+
+    返回:
+    - (去重后的 DataFrame, 删除的行数)。
+
+    一次稳定排序加向量化的分组边界判断，已经有序时不排序；没有重复时返回 df 的浅拷贝。
+    """
+    times = _time_ns(_time_column(df, key))
+    order = None
+    if len(times) > 1 and not np.all(times[1:] >= times[:-1]):
+        # 只对时间排序，最后一次 take 取出保留的行，不对整个 df 重排两次
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+
+    changed = times[1:] != times[:-1]
+    dropped = max(len(times) - 1 - int(np.count_nonzero(changed)), 0)
+    if dropped == 0:
+        return (df.copy(deep=False) if order is None else df.take(order)), 0
+    # is_start[i] / is_end[i]: 排序后第 i 行是一组相同时间的第一行 / 最后一行
+    is_start = np.concatenate(([True], changed))
+    is_end = np.concatenate((changed, [True]))
+
+    def take(mask: np.ndarray) -> pd.DataFrame:
+        rows = np.flatnonzero(mask)
+        return df.take(rows if order is None else order[rows])
+
+    if keep == "first":
+        return take(is_start), dropped
+    if keep == "last":
+        return take(is_end), dropped
+    if not isinstance(keep, dict):
+        raise ValueError("keep must be 'first', 'last' or a dict of aggregations")
+
+    result = take(is_end)
+    group_ids = np.cumsum(is_start) - 1
+    if order is not None:
+        # 组号对应回原来的行，分组内仍是原来的顺序
+        group_ids[order] = group_ids.copy()
+    agg = df[list(keep)].groupby(group_ids).agg(keep)
+    for column in keep:
+        result[column] = agg[column].to_numpy()
+    return result, dropped
+
+
+def _edge_time_ns(df: pd.DataFrame, key: str, last: bool) -> int:
+    """第一行或最后一行的时间(int64 纳秒)，只转换这一行"""
+    column = _time_column(df, key)
+    row = slice(-1, None) if last else slice(0, 1)
+    column = column[row] if isinstance(column, pd.Index) else column.iloc[row]
+    return int(_time_ns(column)[0])
+
+
+def _splice_tail(
+    tail: pd.DataFrame, new: pd.DataFrame, key: str
+) -> tuple[int, pd.DataFrame]:
+    """
+    tail 为按时间升序的 DataFrame，返回 (tail 中需要替换的起始位置, 替换的内容)。
+    new 的时间都在 tail 之后时起始位置为 len(tail)，替换内容为排序去重后的 new；
+    否则把 tail 中不早于 new 最早时间的部分与 new 合并，相同时间以 new 为准。
+    """
+    new = dedupe_bytime(new, key, keep="last")[0]
+    start = _edge_time_ns(new, key, last=False)
+    if len(tail) == 0 or _edge_time_ns(tail, key, last=True) < start:
+        return len(tail), new
+    pos = search_timeidx(pd.Timestamp(start, tz="UTC"), tail, key)
+    merged = pd.concat([tail.iloc[pos:], new])
+    return pos, dedupe_bytime(merged, key, keep="last")[0]
+
+
+def upsert_bytime(base: pd.DataFrame, new: pd.DataFrame, key: str) -> pd.DataFrame:
+    """
+    把 new 按时间合并到 base 的末尾，相同时间的行以 new 为准，返回新的 DataFrame。
+
+    base 需按 key 升序。用 search_timeidx 找到 new 最早时间在 base 中的位置，
+    只对这之后重叠的部分排序去重，之前的行原样保留。
+    key 为列时结果的索引重新编号为 0..n-1，key 为索引时保留时间索引。
+
+    注意: 返回的是新的 DataFrame，每次调用都会把 base 整体复制一次，
+    耗时与 len(base) 成正比而不是与 len(new) 成正比，不是增量操作。
+    实时数据频繁追加少量行时使用 FrameBuffer。
+    """
+    if len(new) == 0:
+        return base.copy(deep=False)
+    pos, spliced = _splice_tail(base, new, key)
+    return pd.concat([base.iloc[:pos], spliced], ignore_index=key != base.index.name)
+
+
+class FrameBuffer:
+    """
+    按时间追加的分块 DataFrame，用于持续追加少量行的实时数据。
+
+    数据保存在按时间排列的若干块中，upsert 只会改写与新数据重叠的末尾几块。
+    相邻的块按大小合并(后一块不小于前一块时合并)，块数保持在 O(log n)，
+    每行被复制的次数为均摊 O(log n)，而不是每次追加都复制整个 DataFrame。
+    frame 在读取时才拼接所有块，并把结果缓存为一块。
+
+    >>> buf = FrameBuffer(history, key="date")
+    >>> buf.upsert(latest_rows)
+    >>> buf.frame
+    """
+
+    def __init__(self, df: pd.DataFrame | None = None, key: str = "date"):
+        self.key = key
+        self._blocks: list[pd.DataFrame] = []
+        if df is not None and len(df) > 0:
+            self._blocks.append(df)
+
+    def __len__(self) -> int:
+        return sum(len(b) for b in self._blocks)
+
+    @property
+    def nblocks(self) -> int:
+        return len(self._blocks)
+
+    def upsert(self, new: pd.DataFrame) -> "FrameBuffer":
+        """
+        合并 new，相同时间的行以 new 为准。new 在末尾之后时只是追加一块。
+        """
+        if len(new) == 0:
+            return self
+        blocks = self._blocks
+        start = int(_time_ns(_time_column(new, self.key)).min())
+        # blocks[i:] 整块都不早于 new，blocks[i - 1] 可能部分重叠
+        i = len(blocks)
+        while i > 0 and _edge_time_ns(blocks[i - 1], self.key, last=False) >= start:
+            i -= 1
+        j = max(i - 1, 0)
+        affected = blocks[j:]
+        del blocks[j:]
+        if not affected:
+            tail = new.iloc[:0]
+        elif len(affected) == 1:
+            tail = affected[0]
+        else:
+            tail = pd.concat(affected)
+        pos, spliced = _splice_tail(tail, new, self.key)
+        if pos == len(tail) and pos > 0:
+            blocks.append(tail)
+        elif pos > 0:
+            blocks.append(tail.iloc[:pos])
+        blocks.append(spliced)
+        self._compact()
+        return self
+
+    def _compact(self):
+        blocks = self._blocks
+        while len(blocks) >= 2 and len(blocks[-1]) >= len(blocks[-2]):
+            last = blocks.pop()
+            blocks[-1] = pd.concat([blocks[-1], last])
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        if not self._blocks:
+            return pd.DataFrame()
+        ignore_index = self._ignore_index
+        if len(self._blocks) > 1 or (
+            ignore_index and not is_default_index(self._blocks[0])
+        ):
+            self._blocks = [pd.concat(self._blocks, ignore_index=ignore_index)]
+        return self._blocks[0]
+
+    @property
+    def _ignore_index(self) -> bool:
+        # key 为列时结果的索引重新编号为 0..n-1，与 upsert_bytime 一致，避免各块的索引重复
+        return self.key != self._blocks[0].index.name
+
+    def tail(self, n: int = 5) -> pd.DataFrame:
+        """最后 n 行，只拼接需要的块"""
+        rows = 0
+        i = len(self._blocks)
+        while i > 0 and rows < n:
+            i -= 1
+            rows += len(self._blocks[i])
+        if i == len(self._blocks):
+            return pd.DataFrame()
+        df = pd.concat(self._blocks[i:]).tail(n)
+        if self._ignore_index:
+            total = len(self)
+            df.index = pd.RangeIndex(total - len(df), total)
+        return df
+
+
+def _asof_positions(
+    times: np.ndarray,
+    clock: np.ndarray,
+    direction: Literal["backward", "forward", "nearest"],
+    tolerance: int | None,
+) -> np.ndarray:
+    """
+    times 为升序的 int64 时间，返回 clock 中每个时间匹配到的 times 的位置，没有匹配为 -1。
+    与 pd.merge_asof 一致: backward 取相同时间的最后一行，forward 取第一行，
+    nearest 距离相同时取 backward。clock 中的 NaT 没有匹配。
+    """
+    n = len(times)
+    if n == 0:
+        return np.full(len(clock), -1, dtype=np.int64)
+    backward = np.searchsorted(times, clock, side="right") - 1
+    if direction == "backward":
+        pos = backward
+    else:
+        forward = np.searchsorted(times, clock, side="left")
+        if direction == "forward":
+            pos = forward
+        elif direction == "nearest":
+            far = np.iinfo(np.int64).max
+            before = times[np.maximum(backward, 0)]
+            after = times[np.minimum(forward, n - 1)]
+            back_dist = np.where(backward >= 0, clock - before, far)
+            fwd_dist = np.where(forward < n, after - clock, far)
+            pos = np.where(fwd_dist < back_dist, forward, backward)
+        else:
+            raise ValueError("direction must be 'backward', 'forward' or 'nearest'")
+    # NaT 为 int64 最小值，forward / nearest 会匹配到第一行，需要排除
+    valid = (pos >= 0) & (pos < n) & (clock != _NAT)
+    if tolerance is not None:
+        matched = times[np.clip(pos, 0, n - 1)]
+        valid &= np.abs(clock - matched) <= tolerance
+    return np.where(valid, pos, -1)
+
+
+def align_asof(
+    frames: dict[str, pd.DataFrame],
+    on,
+    key: str = "date",
+    columns: Sequence[str] | None = None,
+    tolerance: str | pd.Timedelta | None = None,
+    direction: Literal["backward", "forward", "nearest"] = "backward",
+) -> pd.DataFrame:
+    """
+    把多个 DataFrame 按时间 asof 对齐到同一条时间轴 on 上，合并为一个宽表。
+
+    参数:
+    - frames: {名称: DataFrame}，key 为时间列名或索引名，不要求已排序，NaT 行被忽略。
+    - on: 参考时间轴(DatetimeIndex、Series 或时间数组)，作为结果的索引，NaT 处全为缺失值。
+    - columns: 每个 DataFrame 中取出的列，默认为除 key 之外的所有列。
+    - tolerance: 最大时间差，超过时为缺失值。
+    - direction: 与 pd.merge_asof 相同，"backward" 取不晚于 on 的最后一行，
+      "forward" 取不早于 on 的第一行，"nearest" 取最近的一行。
+
+    返回:
+    - 以 on 为索引、列为 (名称, 列名) 两层 MultiIndex 的 DataFrame。
+
+    所有时间只转换一次为 UTC int64(不带时区的视为 UTC)，每个 DataFrame 一次 searchsorted，
+    再按位置直接取出各列，不做逐对 merge。
+    """
+    clock_index = pd.DatetimeIndex(on)
+    clock = _time_ns(clock_index)
+    tol = None if tolerance is None else pd.Timedelta(tolerance).value
+
+    data: dict[tuple[str, str], object] = {}
+    for name, df in frames.items():
+        times = _time_ns(_time_column(df, key))
+        rows = None
+        if len(times) > 1 and not np.all(times[1:] >= times[:-1]):
+            rows = np.argsort(times, kind="stable")
+            times = times[rows]
+        if len(times) > 0 and times[0] == _NAT:
+            # NaT 排在最前面，跳过
+            start = int(np.searchsorted(times, _NAT, side="right"))
+            rows = (np.arange(len(times)) if rows is None else rows)[start:]
+            times = times[start:]
+
+        pos = _asof_positions(times, clock, direction, tol)
+        if rows is not None:
+            pos = np.where(pos >= 0, rows[np.maximum(pos, 0)], -1)
+
+        selected = [c for c in df.columns if c != key] if columns is None else columns
+        for column in selected:
+            # allow_fill 对缺失位置填充 NA，整数等类型按 pandas 规则提升
+            data[(name, column)] = pd.api.extensions.take(
+                df[column].array, pos, allow_fill=True
+            )
+
+    result = pd.DataFrame(data, index=clock_index, copy=False)
+    result.columns = pd.MultiIndex.from_tuples(list(data), names=["frame", "column"])
+    result.index.name = key
+    return result
+
+
+# parquet 追加写入的分段超过这个数量时自动合并回主文件
+PARQUET_MAX_SEGMENTS = 32
+
+# Arrow IPC 流格式的结束标记，IPC 文件格式(feather v2)以 ARROW1 开头
+_IPC_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+_IPC_FILE_MAGIC = b"ARROW1"
+
+
+def _segment_dir(p: Path) -> Path:
+    return p.with_name(p.name + ".segments")
+
+
+def _segments(p: Path) -> list[Path]:
+    folder = _segment_dir(p)
+    if not folder.is_dir():
+        return []
+    return sorted(folder.glob("*.parquet"))
+
+
+def _is_ipc_file(p: Path) -> bool:
+    with open(p, "rb") as f:
+        return f.read(len(_IPC_FILE_MAGIC)) == _IPC_FILE_MAGIC
+
+
+def _conform(df: pd.DataFrame, schema, index: bool | None):
+    """df 转为 Arrow Table，列和类型与已有文件的 schema 一致"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=index)
+    if sorted(table.schema.names) != sorted(schema.names):
+        raise ValueError(
+            f"cannot append: columns {table.schema.names} do not match {schema.names}"
+        )
+    errors = (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError)
+    try:
+        return table.select(schema.names).cast(schema)
+    except errors as e:
+        # 列名相同时找出类型不兼容的列
+        for field in schema:
+            column = table.column(field.name)
+            try:
+                column.cast(field.type)
+            except errors:
+                raise ValueError(
+                    f"cannot append: column {field.name!r} of type {column.type} "
+                    f"cannot be cast to {field.type}"
+                ) from e
+        raise ValueError(f"cannot append: {e}") from e
+
+
+def _read_parquet(p: Path) -> pd.DataFrame:
+    segments = _segments(p)
+    if not segments:
+        return pd.read_parquet(p)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tables = [pq.read_table(path) for path in (p, *segments)]
+    return pa.concat_tables(tables).to_pandas()
+
+
+def _append_parquet(df: pd.DataFrame, p: Path, index: bool | None):
+    """
+    新行写入 <文件名>.segments/ 下的一个分段文件，不改写主文件；
+    分段数达到 PARQUET_MAX_SEGMENTS 时合并回主文件。
+    """
+    import pyarrow.parquet as pq
+
+    table = _conform(df, pq.read_schema(p), index)
+    folder = _segment_dir(p)
+    folder.mkdir(exist_ok=True)
+    segments = _segments(p)
+    number = int(segments[-1].stem) + 1 if segments else 1
+    target = folder / f"{number:08d}.parquet"
+    tmp = target.with_suffix(".tmp")
+    pq.write_table(table, tmp)
+    tmp.replace(target)
+    if len(segments) + 1 >= PARQUET_MAX_SEGMENTS:
+        compactpd(p)
+
+
+def _read_feather(p: Path) -> pd.DataFrame:
+    if _is_ipc_file(p):
+        return pd.read_feather(p)
+    import pyarrow as pa
+
+    with pa.ipc.open_stream(p) as reader:
+        return reader.read_all().to_pandas()
+
+
+def _write_ipc_stream(table, p: Path):
+    import pyarrow as pa
+
+    tmp = p.with_name(p.name + ".tmp")
+    with pa.ipc.new_stream(tmp, table.schema) as writer:
+        writer.write_table(table)
+    tmp.replace(p)
+
+
+def _append_feather(df: pd.DataFrame, p: Path):
+    """
+    feather 文件保存为 Arrow IPC 流格式，追加时去掉末尾的结束标记，
+    写入新的 record batch 后再补上结束标记。
+    已有文件是 IPC 文件格式(to_feather 写出的 feather v2)或包含字典类型的列时，
+    合并后整体重写为流格式，之后的追加不再重写。
+    """
+    import pyarrow as pa
+
+    if _is_ipc_file(p):
+        import pyarrow.feather as feather
+
+        old = feather.read_table(p)
+        _write_ipc_stream(pa.concat_tables([old, _conform(df, old.schema, False)]), p)
+        return
+
+    with pa.ipc.open_stream(p) as reader:
+        schema = reader.schema
+    table = _conform(df, schema, False)
+    if any(pa.types.is_dictionary(field.type) for field in schema):
+        with pa.ipc.open_stream(p) as reader:
+            old = reader.read_all()
+        _write_ipc_stream(pa.concat_tables([old, table]), p)
+        return
+
+    with open(p, "r+b") as f:
+        f.seek(-len(_IPC_EOS), 2)
+        if f.read() == _IPC_EOS:
+            f.seek(-len(_IPC_EOS), 2)
+        for batch in table.to_batches():
+            f.write(batch.serialize())
+        f.write(_IPC_EOS)
+        f.truncate()
+
+
 def readpd(p: Path | str):
+    """
+    读取 csv / feather / parquet。parquet 的追加分段和 feather 的 IPC 流格式
+    (writepd 的 append=True 写出)会自动合并读取。
+    """
     if isinstance(p, str):
         p = Path(p)
     suffix = p.suffix.lower()
@@ -193,35 +627,124 @@ def readpd(p: Path | str):
         case ".csv":
             return pd.read_csv(p)
         case ".feather":
-            return pd.read_feather(p)
+            return _read_feather(p)
         case ".parquet":
-            return pd.read_parquet(p)
+            return _read_parquet(p)
         case _:
             raise TypeError("file format not support ", suffix, " : ", p)
 
 
-def writepd(df: pd.DataFrame, p: Path | str, index: bool | None = None):
+def _csv_header(p: Path) -> list[str]:
+    """csv 文件第一行的列名，空文件为 []"""
+    import csv
+
+    with open(p, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def _csv_append_index(df: pd.DataFrame, header: list[str], index: bool | None) -> bool:
+    """
+    根据已有 csv 的表头判断追加时是否写索引：表头只有列名时不写，
+    表头为 索引名 + 列名 时写。与 index 参数或表头都不一致时抛出 ValueError。
+    """
+    columns = [str(c) for c in df.columns]
+    index_names = ["" if n is None else str(n) for n in df.index.names]
+    if header == columns and index is not True:
+        return False
+    if header == index_names + columns and index is not False:
+        return True
+    raise ValueError(f"cannot append: columns {columns} do not match {header}")
+
+
+def writepd(
+    df: pd.DataFrame,
+    p: Path | str,
+    index: bool | None = None,
+    append: bool = False,
+):
+    """
+    append 为 True 且文件已存在时只写入新增的行，不改写已有内容：
+    csv 追加到末尾(不写表头，是否写索引由已有的表头决定)；
+    parquet 写为 <文件名>.segments/ 下的分段文件，分段数达到 PARQUET_MAX_SEGMENTS 时自动 compactpd；
+    feather 以 Arrow IPC 流格式追加 record batch。
+    追加的列和类型需要与已有文件一致，readpd 读取的是合并后的结果。
+    """
     if isinstance(p, str):
         p = Path(p)
 
     suffix = p.suffix.lower()
+    append = append and p.exists()
     match suffix:
         case ".csv":
+            header = _csv_header(p) if append else []
+            if header:
+                # 追加时是否写索引由已有文件的表头决定，列也要与表头一致
+                index = _csv_append_index(df, header, index)
+            else:
+                append = False
             if index is None:
                 index = not is_default_index(df)
+            mode = "a" if append else "w"
             if df.index.name is None:
-                return df.to_csv(path_or_buf=p, index=index)
+                return df.to_csv(
+                    path_or_buf=p, index=index, mode=mode, header=not append
+                )
             else:
-                return df.to_csv(path_or_buf=p, index=index, index_label=df.index.name)
+                return df.to_csv(
+                    path_or_buf=p,
+                    index=index,
+                    index_label=df.index.name,
+                    mode=mode,
+                    header=not append,
+                )
 
         case ".feather":
+            if append:
+                return _append_feather(df, p)
             return df.to_feather(path=p)
         case ".parquet":
+            if append:
+                return _append_parquet(df, p, index)
+            # 覆盖写入时旧的分段不再有效
+            shutil.rmtree(_segment_dir(p), ignore_errors=True)
             return df.to_parquet(path=p, index=index)
         case _:
             raise TypeError("file format not support ", suffix, " : ", p)
 
 
+def compactpd(p: Path | str):
+    """
+    把 parquet 的追加分段合并回主文件，feather 的 IPC 流格式重写为 IPC 文件格式。
+    先写临时文件再替换，中途失败不影响原文件。
+    """
+    if isinstance(p, str):
+        p = Path(p)
+    suffix = p.suffix.lower()
+    if suffix == ".parquet":
+        segments = _segments(p)
+        if not segments:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tables = [pq.read_table(path) for path in (p, *segments)]
+        tmp = p.with_name(p.name + ".tmp")
+        pq.write_table(pa.concat_tables(tables), tmp)
+        tmp.replace(p)
+        shutil.rmtree(_segment_dir(p), ignore_errors=True)
+    elif suffix == ".feather":
+        if _is_ipc_file(p):
+            return
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        with pa.ipc.open_stream(p) as reader:
+            table = reader.read_all()
+        tmp = p.with_name(p.name + ".tmp")
+        feather.write_feather(table, tmp)
+        tmp.replace(p)
+
+
 def sum_none(df: pd.DataFrame, axis: AxisType = "columns"):
     """
     Calculate the number of missing (NaN) values in each column of a DataFrame.
@@ -238,9 +761,201 @@ def sum_none(df: pd.DataFrame, axis: AxisType = "columns"):
 
     if axis == "index":
         na_counts = df.isna().sum(axis=1)
-        result = {index: count for index, count in na_counts.items() if count > 0}
     elif axis == "columns":
         na_counts = df.isna().sum(axis=0)
-        result = {column: count for column, count in na_counts.items() if count > 0}
+    # 先筛选出非零项，只为有缺失值的行/列建立字典
+    return na_counts[na_counts > 0].to_dict()
 
-    return result
+
+def _time_column(df: pd.DataFrame, key: str) -> pd.Index | pd.Series:
+    if key == df.index.name:
+        return df.index
+    elif key in df.columns:
+        return df[key]
+    raise ValueError("Invalid key: key must be in df.columns or index.")
+
+
+def _time_ns(column: pd.Index | pd.Series) -> np.ndarray:
+    """
+    时间列转为 int64 纳秒，带时区的为 UTC 时间，NaT 为 np.iinfo(np.int64).min。
+    """
+    return pd.DatetimeIndex(column).as_unit("ns").asi8
+
+
+_NAT = np.iinfo(np.int64).min
+
+
+class FrameProfile:
+    """
+    profile() 的结果。位置均为从 0 开始的行号(不是索引标签)。
+
+    - rows: 行数
+    - nan_counts: 每列的缺失值个数
+    - nan_rows / nan_row_counts: 有缺失值的行及其缺失值个数(稀疏表示)
+    - duplicate_positions: 时间与上一行相同的行
+    - nonmonotonic_positions: 时间早于上一行的行
+    - gap_positions / gap_missing: 与上一行的间隔大于 freq 的行，以及中间缺少的 freq 个数
+
+    与上一行比较时跳过 NaT。多个分块的结果按顺序用 merge 合并，
+    等价于对拼接后的整个 DataFrame 调用 profile。
+    """
+
+    def __init__(
+        self,
+        rows: int,
+        nan_counts: pd.Series,
+        nan_rows: np.ndarray,
+        nan_row_counts: np.ndarray,
+        duplicate_positions: np.ndarray,
+        nonmonotonic_positions: np.ndarray,
+        gap_positions: np.ndarray,
+        gap_missing: np.ndarray,
+        first_time: int,
+        last_time: int,
+        freq: pd.Timedelta | None,
+    ):
+        self.rows = rows
+        self.nan_counts = nan_counts
+        self.nan_rows = nan_rows
+        self.nan_row_counts = nan_row_counts
+        self.duplicate_positions = duplicate_positions
+        self.nonmonotonic_positions = nonmonotonic_positions
+        self.gap_positions = gap_positions
+        self.gap_missing = gap_missing
+        # 第一行、最后一行的时间(int64 纳秒)，用于合并时比较分块边界
+        self.first_time = first_time
+        self.last_time = last_time
+        self.freq = freq
+
+    @property
+    def duplicates(self) -> int:
+        return len(self.duplicate_positions)
+
+    @property
+    def nonmonotonic(self) -> int:
+        return len(self.nonmonotonic_positions)
+
+    @property
+    def gaps(self) -> int:
+        return len(self.gap_positions)
+
+    @property
+    def missing(self) -> int:
+        """按 freq 计算缺少的时间点总数"""
+        return int(self.gap_missing.sum())
+
+    def row_nan_counts(self) -> pd.Series:
+        """以行号为索引的每行缺失值个数，只包含有缺失值的行"""
+        return pd.Series(self.nan_row_counts, index=self.nan_rows, name="nan_count")
+
+    def merge(self, other: "FrameProfile") -> "FrameProfile":
+        """
+        合并紧跟在本分块之后的 other 分块的结果，返回新的 FrameProfile。
+        """
+        if self.freq != other.freq:
+            raise ValueError(f"freq differs: {self.freq} != {other.freq}")
+        offset = self.rows
+        duplicate = [self.duplicate_positions, other.duplicate_positions + offset]
+        nonmonotonic = [
+            self.nonmonotonic_positions,
+            other.nonmonotonic_positions + offset,
+        ]
+        gap = [self.gap_positions, other.gap_positions + offset]
+        missing = [self.gap_missing, other.gap_missing]
+        # 分块边界: self 的最后一行与 other 的第一行
+        if self.rows and other.rows and _NAT not in (self.last_time, other.first_time):
+            delta = other.first_time - self.last_time
+            boundary = np.array([offset], dtype=np.int64)
+            if delta == 0:
+                duplicate.insert(1, boundary)
+            elif delta < 0:
+                nonmonotonic.insert(1, boundary)
+            elif self.freq is not None and delta > self.freq.value:
+                gap.insert(1, boundary)
+                missing.insert(1, np.array([delta // self.freq.value - 1]))
+
+        return FrameProfile(
+            rows=self.rows + other.rows,
+            nan_counts=self.nan_counts.add(other.nan_counts, fill_value=0).astype(
+                np.int64
+            ),
+            nan_rows=np.concatenate([self.nan_rows, other.nan_rows + offset]),
+            nan_row_counts=np.concatenate([self.nan_row_counts, other.nan_row_counts]),
+            duplicate_positions=np.concatenate(duplicate),
+            nonmonotonic_positions=np.concatenate(nonmonotonic),
+            gap_positions=np.concatenate(gap),
+            gap_missing=np.concatenate(missing),
+            first_time=self.first_time if self.rows else other.first_time,
+            last_time=other.last_time if other.rows else self.last_time,
+            freq=self.freq,
+        )
+
+    def summary(self) -> dict[str, int]:
+        return {
+            "rows": self.rows,
+            "nan_cells": int(self.nan_counts.sum()),
+            "nan_rows": len(self.nan_rows),
+            "duplicates": self.duplicates,
+            "nonmonotonic": self.nonmonotonic,
+            "gaps": self.gaps,
+            "missing": self.missing,
+        }
+
+    def __repr__(self):
+        items = ", ".join(f"{k}={v}" for k, v in self.summary().items())
+        return f"FrameProfile({items})"
+
+
+def profile(
+    df: pd.DataFrame,
+    time_key: str | None = None,
+    freq: str | pd.Timedelta | None = None,
+) -> FrameProfile:
+    """
+    一次遍历统计 df 的缺失值和时间列的质量，全部为向量化计算。
+
+    参数:
+    - time_key: 时间列名或索引名，为 None 时不做时间相关的检查。
+    - freq: 期望的时间间隔，为 None 时不统计间隔。
+
+    流式读取时对每个分块调用 profile，再按顺序 merge:
+    >>> parts = (profile(chunk, "date", "1min") for chunk in chunks)
+    >>> result = functools.reduce(FrameProfile.merge, parts)
+    """
+    freq = None if freq is None else pd.Timedelta(freq)
+    nan_mask = df.isna().to_numpy()
+    nan_counts = pd.Series(
+        nan_mask.sum(axis=0, dtype=np.int64), index=df.columns, name="nan_count"
+    )
+    row_counts = nan_mask.sum(axis=1, dtype=np.int64)
+    nan_rows = np.flatnonzero(row_counts)
+    del nan_mask
+
+    empty = np.empty(0, dtype=np.int64)
+    duplicate = nonmonotonic = gap = missing = empty
+    first_time = last_time = _NAT
+    if time_key is not None and len(df) > 0:
+        times = _time_ns(_time_column(df, time_key))
+        first_time, last_time = int(times[0]), int(times[-1])
+        prev, cur = times[:-1], times[1:]
+        delta = cur - prev
+        valid = (prev != _NAT) & (cur != _NAT)
+        duplicate = np.flatnonzero(valid & (delta == 0)) + 1
+        nonmonotonic = np.flatnonzero(valid & (delta < 0)) + 1
+        if freq is not None:
+            gap = np.flatnonzero(valid & (delta > freq.value)) + 1
+            missing = delta[gap - 1] // freq.value - 1
+
+    return FrameProfile(
+        rows=len(df),
+        nan_counts=nan_counts,
+        nan_rows=nan_rows,
+        nan_row_counts=row_counts[nan_rows],
+        duplicate_positions=duplicate,
+        nonmonotonic_positions=nonmonotonic,
+        gap_positions=gap,
+        gap_missing=missing,
+        first_time=first_time,
+        last_time=last_time,
+        freq=freq,
+    )
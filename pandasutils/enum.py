@@ -1,40 +1,62 @@
+from types import MappingProxyType
 from typing import Any
-from collections.abc import Iterator
+from collections.abc import Iterator, Mapping
 
 
 class Enum:
     """
     类似 Enum 的自定义实现
+
+    子类在定义时(__init_subclass__)一次性收集成员，之后的查询都不再扫描类属性。
+    子类会继承父类的成员，并可以用同名属性覆盖。
+    相同的值对应多个成员时，name_of 返回最先定义的成员名。
     """
 
-    # 类级别的字典，用于存储成员和值
-    __kv__ = {}
+    # 成员名 -> 值，每个子类各自持有一份只读映射
+    __kv__: Mapping[str, Any] = MappingProxyType({})
+    # 值 -> 成员名，只包含可哈希的值
+    __vk__: Mapping[Any, str] = MappingProxyType({})
+    # 不可哈希的值，contains / name_of 对它们退化为线性查找
+    __unhashable__: tuple[tuple[str, Any], ...] = ()
 
-    @classmethod
-    def __init__(cls):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
         cls._initialize()
 
     @classmethod
     def _initialize(cls):
         """
-        初始化枚举成员字典（如果未初始化），并存储成员名称和值。
+        收集父类和本类中的枚举成员，建立成员字典和值到成员名的反向索引。
         """
-        if not cls.__kv__ or len(cls.__kv__) <= 0:
-            cls.__kv__ = dict[str, Any]()
-            for attr, value in cls.__dict__.items():
-                if not callable(value) and not attr.startswith("__"):
-                    # 创建一个实例，绑定到枚举成员
-                    cls.__kv__[attr] = value
+        members: dict[str, Any] = {}
+        for klass in reversed(cls.__mro__):
+            for attr, value in vars(klass).items():
+                if attr.startswith("__") or callable(value):
+                    continue
+                if isinstance(value, classmethod | staticmethod | property):
+                    continue
+                members[attr] = value
+
+        index: dict[Any, str] = {}
+        unhashable: list[tuple[str, Any]] = []
+        for attr, value in members.items():
+            try:
+                index.setdefault(value, attr)
+            except TypeError:
+                unhashable.append((attr, value))
+
+        cls.__kv__ = MappingProxyType(members)
+        cls.__vk__ = MappingProxyType(index)
+        cls.__unhashable__ = tuple(unhashable)
 
     @classmethod
-    def dict(cls) -> dict[str, Any]:
+    def dict(cls) -> Mapping[str, Any]:
         """
-        获取枚举成员的字典表示，初始化枚举成员（如果未初始化）。
+        获取枚举成员的只读字典表示。
 
         Returns:
-            dict[str, Any]: 枚举成员的字典表示。
+            Mapping[str, Any]: 枚举成员的字典表示。
         """
-        cls._initialize()  # 确保初始化枚举成员
         return cls.__kv__
 
     @classmethod
@@ -49,7 +71,6 @@ class Enum:
                 print(k,v)
 
         """
-        cls._initialize()  # 确保初始化枚举成员
         return iter(cls.__kv__.items())
 
     @classmethod
@@ -60,16 +81,40 @@ class Enum:
         Returns:
             Iterator[str]: 枚举成员的键迭代器。
         """
-        cls._initialize()  # 确保初始化枚举成员
         return iter(cls.__kv__.keys())
 
     @classmethod
     def values(cls) -> Iterator[Any]:
         """
-        返回枚举成员的键迭代器。
+        返回枚举成员的值迭代器。
 
         Returns:
-            Iterator[str]: 枚举成员的键迭代器。
+            Iterator[Any]: 枚举成员的值迭代器。
         """
-        cls._initialize()  # 确保初始化枚举成员
         return iter(cls.__kv__.values())
+
+    @classmethod
+    def contains(cls, value: Any) -> bool:
+        """
+        value 是否为某个枚举成员的值，可哈希的值为 O(1)。
+        """
+        try:
+            return value in cls.__vk__
+        except TypeError:
+            return any(v == value for _, v in cls.__unhashable__)
+
+    @classmethod
+    def name_of(cls, value: Any) -> str:
+        """
+        返回值为 value 的枚举成员名，可哈希的值为 O(1)。
+
+        Raises:
+            KeyError: value 不是任何枚举成员的值。
+        """
+        try:
+            return cls.__vk__[value]
+        except TypeError:
+            for attr, v in cls.__unhashable__:
+                if v == value:
+                    return attr
+        raise KeyError(value)
@@ -1,16 +1,254 @@
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
 from pathlib import Path
+from typing import Literal
 
 import pandas as pd
 
-from . import pathutil
+from . import dfutil, log, pathutil
+from .foldermeta import FolderMeta
 
+OutputFormat = Literal["csv", "parquet", "feather"]
+SheetSpec = Literal["first", "all"] | list[str | int]
 
-def convert_excel_to_csv(excel_folder, csv_folder):
+
+def _output_paths(
+    item: Path, csv_folder: Path, sheet_names: list[str | int] | None, fmt: str
+) -> list[Path]:
+    """
+    sheet_names 为 None 时只有第一个工作表，输出 文件名.<fmt>；
+    否则每个工作表输出 文件名.<工作表名>.<fmt>。
+    """
+    folder = csv_folder / item.parent.stem
+    if sheet_names is None:
+        return [folder / f"{item.stem}.{fmt}"]
+    return [
+        folder / f"{item.stem}.{pathutil.sanitize_filename(str(name))}.{fmt}"
+        for name in sheet_names
+    ]
+
+
+def _write(df: pd.DataFrame, path: Path, fmt: str):
+    pathutil.create_dir(path)
+    if fmt == "csv":
+        df.to_csv(path, index=False, encoding="utf_8_sig")
+    else:
+        # read_excel 的列名可能是数字，parquet / feather 要求字符串列名
+        df.columns = [str(c) for c in df.columns]
+        dfutil.writepd(df, path, index=False)
+
+
+def _header(row: tuple) -> list[str]:
+    """与 read_excel 一致：空列名为 Unnamed: i，重复列名依次加 .1、.2"""
+    names: list[str] = []
+    seen: dict[str, int] = {}
+    for i, value in enumerate(row):
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _data_rows(rows: Iterator[tuple], width: int) -> Iterator[tuple]:
+    """补齐 / 截断到 width 列，与 read_excel 一致保留中间的空行、丢弃末尾的空行"""
+    blank = (None,) * width
+    pending = 0
+    for row in rows:
+        if all(v is None for v in row):
+            pending += 1
+            continue
+        for _ in range(pending):
+            yield blank
+        pending = 0
+        yield (row + blank)[:width]
+
+
+def iter_sheet_chunks(ws, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    按 chunksize 行一块读取只读模式(read_only=True)打开的工作表，第一行作为列名。
+    同一时刻只持有一块数据。
+    """
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = _header(header)
+    rows = _data_rows(rows, len(columns))
+    while chunk := list(islice(rows, chunksize)):
+        yield pd.DataFrame(chunk, columns=columns)
+
+
+class _ChunkWriter:
+    """
+    将多块 DataFrame 依次写入同一个文件：csv 追加写入，parquet 每块一个 row group，
+    feather 每块一个 record batch。parquet / feather 的 schema 由第一块决定，
+    其中的整数列放宽为 float64：Excel 中的数字都是双精度浮点数，
+    第一块中恰好都是整数的列在后面的块中可能出现小数。
+
+    先写入同目录下的临时文件，close() 时才替换输出文件，中途失败时调用 abort()，
+    不会留下写了一半的输出文件。
+    """
+
+    def __init__(self, path: Path, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        # 保留后缀，dfutil.writepd 按后缀判断格式
+        self._tmp = path.with_name(f".{path.stem}.tmp{path.suffix}")
+        self._writer = None
+        self._schema = None
+        self._header = True
+        self.rows = 0
+        pathutil.create_dir(path)
+
+    def write(self, df: pd.DataFrame):
+        if self.fmt == "csv":
+            df.to_csv(
+                self._tmp,
+                index=False,
+                encoding="utf_8_sig" if self._header else "utf-8",
+                mode="w" if self._header else "a",
+                header=self._header,
+            )
+            self._header = False
+            self.rows += len(df)
+            return
+
+        import pyarrow as pa
+
+        if self._schema is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            for i, field in enumerate(schema):
+                if pa.types.is_null(field.type):
+                    # 第一块中全为空的列类型为 null，无法容纳后续数据，按字符串处理
+                    schema = schema.set(i, field.with_type(pa.string()))
+                elif pa.types.is_integer(field.type):
+                    schema = schema.set(i, field.with_type(pa.float64()))
+            self._schema = schema
+            self._writer = self._open(schema)
+        try:
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ValueError(
+                f"{self.path}: 第 {self.rows} 行之后的数据类型与前面的块不一致，"
+                "请增大 chunksize 或输出为 csv"
+            ) from e
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def _open(self, schema):
+        import pyarrow as pa
+
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            return pq.ParquetWriter(self._tmp, schema)
+        return pa.ipc.new_file(self._tmp, schema)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        elif self.rows == 0:
+            # 空工作表也输出文件，与一次性读取时一致
+            _write(pd.DataFrame(), self._tmp, self.fmt)
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._tmp.unlink(missing_ok=True)
+
+
+def _convert_streaming(
+    item: Path, csv_folder: Path, sheets: SheetSpec, fmt: str, chunksize: int
+) -> list[Path]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(item, read_only=True, data_only=True)
+    try:
+        if sheets == "first":
+            selected = [wb.worksheets[0]]
+            outputs = _output_paths(item, csv_folder, None, fmt)
+        else:
+            names = (
+                wb.sheetnames
+                if sheets == "all"
+                else [wb.sheetnames[s] if isinstance(s, int) else s for s in sheets]
+            )
+            selected = [wb[name] for name in names]
+            outputs = _output_paths(item, csv_folder, names, fmt)
+        for ws, path in zip(selected, outputs):
+            writer = _ChunkWriter(path, fmt)
+            try:
+                for df in iter_sheet_chunks(ws, chunksize):
+                    writer.write(df)
+            except BaseException:
+                writer.abort()
+                raise
+            writer.close()
+    finally:
+        wb.close()
+    return outputs
+
+
+def _convert_one(
+    item: Path,
+    csv_folder: Path,
+    sheets: SheetSpec,
+    fmt: str,
+    chunksize: int | None = None,
+) -> list[Path]:
+    """转换单个工作簿，返回写出的文件。在子进程中执行。"""
+    if chunksize is not None:
+        return _convert_streaming(item, csv_folder, sheets, fmt, chunksize)
+    if sheets == "first":
+        df = pd.read_excel(item, engine="openpyxl")
+        outputs = _output_paths(item, csv_folder, None, fmt)
+        _write(df, outputs[0], fmt)
+        return outputs
+
+    sheet_name = None if sheets == "all" else list(sheets)
+    frames = pd.read_excel(item, sheet_name=sheet_name, engine="openpyxl")
+    outputs = _output_paths(item, csv_folder, list(frames.keys()), fmt)
+    for df, path in zip(frames.values(), outputs):
+        _write(df, path, fmt)
+    return outputs
+
+
+def convert_excel_to_csv(
+    excel_folder,
+    csv_folder,
+    sheets: SheetSpec = "first",
+    fmt: OutputFormat = "csv",
+    workers: int | None = None,
+    force: bool = False,
+    chunksize: int | None = None,
+) -> list[Path]:
     """
     递归地将指定文件夹中的所有Excel文件转换为CSV文件，并确保CSV文件名唯一。
 
     :param excel_folder: 包含Excel文件的文件夹路径（Path对象或字符串）
     :param csv_folder: 存储CSV文件的文件夹路径（Path对象或字符串）
+    :param sheets: "first" 只转换第一个工作表，输出 <父文件夹名>/<文件名>.<fmt>；
+        "all" 或工作表名/序号的列表时每个工作表输出 <父文件夹名>/<文件名>.<工作表名>.<fmt>
+    :param fmt: 输出格式 "csv"、"parquet" 或 "feather"，后两者通过 dfutil.writepd 写出
+    :param workers: 进程池大小，None 为 CPU 核数，1 表示在当前进程中逐个转换
+    :param force: 为 True 时忽略清单，全部重新转换
+    :param chunksize: 不为 None 时以只读模式流式读取工作簿，每 chunksize 行写出一次，
+        内存占用只与 chunksize 有关而与工作表大小无关，适合很大的工作簿
+    :return: 本次写出的文件
+
+    csv_folder 中的清单(FolderMeta)记录每个源文件转换时的大小和 mtime，
+    源文件未变化、转换参数相同且输出文件都存在时跳过该文件。
+    清单中的输出文件路径相对于 csv_folder，与当前工作目录无关。
     """
     # 将输入转换为Path对象
     excel_folder = Path(excel_folder)
@@ -18,17 +256,76 @@ def convert_excel_to_csv(excel_folder, csv_folder):
 
     # 确保csv文件夹存在
     csv_folder.mkdir(parents=True, exist_ok=True)
+    manifest = FolderMeta(csv_folder, suffix=".manifest.json")
+    if manifest.path.exists():
+        manifest.load()
+    options = {"sheets": sheets, "fmt": fmt}
 
-    # 遍历excel_folder中的所有文件和子文件夹
+    todo: list[tuple[Path, str, dict]] = []
+    skipped = 0
     for item in excel_folder.rglob("*.xlsx"):
-        # 读取Excel文件
-        df = pd.read_excel(item, engine="openpyxl")
+        key = item.relative_to(excel_folder).as_posix()
+        st = item.stat()
+        stamp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, **options}
+        entry = manifest.get(key)
+        if (
+            not force
+            and entry is not None
+            and {k: entry.get(k) for k in stamp} == stamp
+            and all((csv_folder / p).exists() for p in entry.get("outputs", []))
+        ):
+            skipped += 1
+            continue
+        todo.append((item, key, stamp))
+
+    def _run(executor: ProcessPoolExecutor | None):
+        if executor is None:
+            for item, key, stamp in todo:
+                try:
+                    yield item, key, stamp, _convert_one(
+                        item, csv_folder, sheets, fmt, chunksize
+                    )
+                except Exception as e:
+                    yield item, key, stamp, e
+            return
+        futures = [
+            (
+                item,
+                key,
+                stamp,
+                executor.submit(_convert_one, item, csv_folder, sheets, fmt, chunksize),
+            )
+            for item, key, stamp in todo
+        ]
+        for item, key, stamp, future in futures:
+            try:
+                yield item, key, stamp, future.result()
+            except Exception as e:
+                yield item, key, stamp, e
+
+    written: list[Path] = []
+    failed = 0
+    serial = workers == 1 or len(todo) <= 1
+    with (
+        nullcontext() if serial else ProcessPoolExecutor(max_workers=workers)
+    ) as executor:
+        for item, key, stamp, result in _run(executor):
+            if isinstance(result, Exception):
+                # 单个文件失败不影响其他文件，失败的文件不写入清单，下次会重试
+                failed += 1
+                log.error("转换 %s 失败: %r", item, result)
+                continue
+            log.debug("已将 %s 转换为 %s", item, ", ".join(map(str, result)))
+            outputs = [p.relative_to(csv_folder).as_posix() for p in result]
+            manifest[key] = {**stamp, "outputs": outputs}
+            written.extend(result)
 
-        # 构造CSV文件的唯一路径和名称
-        # 使用item.parent.stem来获取父文件夹的最后一个组成部分（即名称）
-        # 将其与文件名和.csv扩展名组合起来
-        csv_path = csv_folder / item.parent.stem / f"{item.stem}.csv"
-        pathutil.create_dir(csv_path)
-        # 将DataFrame保存到CSV文件
-        df.to_csv(csv_path, index=False, encoding="utf_8_sig")
-        print(f"已将 {item} 转换为 {csv_path}")
+    if len(todo) > failed:
+        manifest.dump()
+    log.info(
+        "Excel 转换完成: 转换 %d 个，跳过 %d 个，失败 %d 个",
+        len(todo) - failed,
+        skipped,
+        failed,
+    )
+    return written
@@ -1,12 +1,139 @@
 from pathlib import Path
+import atexit
 import json
-from .log import logging
+import logging
+import marshal
+import os
+import sqlite3
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，此时不加文件锁
+    fcntl = None
+
+
+# 元数据文件读取缓存: 路径 -> ((mtime_ns, size, inode), 解析结果, 解析结果的 marshal 字节)
+# marshal.loads 比重新解析 JSON 快，用于得到解析结果的独立副本
+_read_cache: dict[str, tuple[tuple[int, int, int], object, bytes]] = {}
+_read_cache_lock = threading.Lock()
+
+
+def _read_metadata(path: Path, copy: bool = False):
+    """
+    读取并解析元数据文件，文件不存在时返回 None。
+    文件的 mtime、大小和 inode 都没变时直接使用缓存，不再读取和解析。
+    copy 为 False 时返回缓存中共享的对象，不要原地修改；为 True 时返回独立的副本。
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+    key = os.fspath(path)
+    cached = _read_cache.get(key)
+    if cached is None or cached[0] != stamp:
+        with open(file=path, mode="r", encoding="utf-8") as f:
+            text = f.read()
+        # _create_metadata_file 会创建空文件，空文件视为 {}
+        obj = json.loads(text) if text.strip() else {}
+        cached = (stamp, obj, marshal.dumps(obj))
+        with _read_cache_lock:
+            _read_cache[key] = cached
+    return marshal.loads(cached[2]) if copy else cached[1]
+
+
+def _read_json(path: Path):
+    """不经过缓存直接读取元数据文件，文件不存在时返回 None，空文件视为 {}。"""
+    try:
+        with open(file=path, mode="r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    return json.loads(text) if text.strip() else {}
+
+
+def _write_atomic(path: Path, obj):
+    """先写入同目录下的临时文件再改名，读者不会读到写了一半的文件。"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode="w", encoding="utf-8") as f:
+            json.dump(obj=obj, fp=f, indent=4, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """
+    在 <元数据文件>.lock 上加 fcntl 排他锁(建议锁)，多个进程的读-合并-写互斥。
+    元数据文件本身会被改名替换，所以不能直接锁它。
+    """
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), mode="a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _json_key(value) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+# 写回模式的实例，进程退出时由 _flush_writeback 统一写入。
+# 弱引用，不会让实例一直存活；dict 子类不可哈希，所以按 id 保存
+_writeback: "weakref.WeakValueDictionary[int, FolderMeta]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+@atexit.register
+def _flush_writeback():
+    for meta in list(_writeback.values()):
+        try:
+            meta.flush()
+        except Exception:
+            logging.exception(f"Failed to flush metadata file {meta.path}")
 
 
 class FolderMeta(dict):
-    def __init__(self, path: Path):
+    def __init__(
+        self,
+        path: Path,
+        suffix: str = ".meta.json",
+        writeback_interval: float | None = None,
+    ):
+        """
+        path 为已存在的元数据文件时直接使用，否则视为文件夹，
+        元数据文件为 文件夹/.<文件夹名><suffix>。
 
-        self.path = path if path.is_file() else FolderMeta._get_metadata_path(path)
+        writeback_interval 不为 None 时为写回模式: dump() 只标记有修改，
+        最多 writeback_interval 秒后由后台定时器合并写入一次，进程退出时也会写入。
+        """
+        self.path = (
+            path if path.is_file() else FolderMeta._get_metadata_path(path, suffix)
+        )
+        self.writeback_interval = writeback_interval
+        # 上次与文件同步时每个键的 JSON 文本，用于找出本进程修改过的键
+        self._synced: dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._timer: threading.Timer | None = None
+        if writeback_interval is not None:
+            _writeback[id(self)] = self
 
     @classmethod
     def _get_metadata_path(cls, dir: Path, suffix: str = ".meta.json"):
@@ -17,26 +144,106 @@ class FolderMeta(dict):
     def writeto(cls, obj, folderpath: Path):
 
         meta_path = cls._create_metadata_file(folderpathormetafile=folderpath)
-        with open(file=meta_path, mode="w", encoding="utf-8") as f:
-            json.dump(obj=obj, fp=f, indent=4, ensure_ascii=False)
+        _write_atomic(meta_path, obj)
 
     def dump(self):
-        FolderMeta.writeto(obj=self, folderpath=self.path)
+        """
+        把本进程修改过的键合并到文件中。
+
+        在文件锁内重新读取文件，只用本进程新增、修改、删除的键覆盖文件内容，
+        其他进程写入的键会保留，并同步回 self。写入为临时文件 + 改名。
+        本进程没有修改任何键且文件已存在时不写入。
+        写回模式下只启动定时器，由 flush() 完成实际写入。
+        """
+        if self.writeback_interval is None:
+            self.flush()
+            return
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.writeback_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            current = {k: _json_key(v) for k, v in self.items()}
+            changed = {k for k, text in current.items() if self._synced.get(k) != text}
+            deleted = self._synced.keys() - current.keys()
+            if not changed and not deleted and self.path.exists():
+                # 本进程没有修改，不重写文件
+                return
+            with _file_lock(self.path):
+                # 锁内直接读取文件，不使用 (mtime, size, inode) 缓存：
+                # inode 会在改名后被复用，NFS 上 mtime 精度也可能不够，
+                # 缓存可能把其他进程刚写入的内容当成旧内容
+                merged = _read_json(self.path) or {}
+                for k in changed:
+                    merged[k] = self[k]
+                for k in deleted:
+                    merged.pop(k, None)
+                _write_atomic(self.path, merged)
+            # 只同步其他进程修改过的键，本进程修改过的键保持不变
+            synced = {k: _json_key(v) for k, v in merged.items()}
+            for k in current.keys() - changed - synced.keys():
+                del self[k]
+            for k, text in synced.items():
+                if k not in changed and current.get(k) != text:
+                    self[k] = merged[k]
+            self._synced = synced
+
+    # 写回模式下 flush() 在定时器线程中执行，修改 self 的方法都要持有 self._lock
+    def __setitem__(self, key, value):
+        with self._lock:
+            dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        with self._lock:
+            dict.__delitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        with self._lock:
+            dict.update(self, *args, **kwargs)
+
+    def pop(self, *args):
+        with self._lock:
+            return dict.pop(self, *args)
+
+    def popitem(self):
+        with self._lock:
+            return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        with self._lock:
+            return dict.setdefault(self, key, default)
+
+    def clear(self):
+        with self._lock:
+            dict.clear(self)
 
     @classmethod
     def loadjson(cls, folderpath: Path, suffix: str = ".meta.json"):
+        """
+        返回的对象在文件未变化时被缓存共享，不要原地修改。
+        """
         metadata_path = cls._get_metadata_path(dir=folderpath, suffix=suffix)
-        if metadata_path.exists():
-            with open(file=metadata_path, mode="r", encoding="utf-8") as f:
-                return json.load(fp=f)
-        else:
+        data = _read_metadata(metadata_path)
+        if data is None:
             logging.error(msg=f"Metadata file {metadata_path} not found.")
             return None
+        return data
 
     def load(self):
-
-        obj = FolderMeta.loadjson(self.path)
-        self.update(obj)  # type: ignore
+        # 取缓存的独立副本，self 的修改不会影响缓存
+        obj = _read_metadata(self.path, copy=True)
+        if obj is None:
+            logging.error(msg=f"Metadata file {self.path} not found.")
+            return self
+        with self._lock:
+            self.update(obj)
+            self._synced = {k: _json_key(v) for k, v in obj.items()}
         return self
 
     @classmethod
@@ -64,3 +271,176 @@ class FolderMeta(dict):
             )
             metadatafile.touch(exist_ok=True)
             return metadatafile
+
+
+def _flatten(obj: dict, prefix: str = ""):
+    """把嵌套 dict 展开为 (点分隔的键, 叶子值)，list 作为整体叶子值。"""
+    for k, v in obj.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict) and v:
+            yield from _flatten(v, key + ".")
+        else:
+            yield key, v
+
+
+def _sql_value(v):
+    if v is None or isinstance(v, (str, int, float)):
+        return v
+    return json.dumps(v, sort_keys=True, ensure_ascii=False)
+
+
+class MetaCatalog:
+    """
+    把 root 下所有 FolderMeta 元数据文件汇总到一个 sqlite 文件中，并支持按值过滤查询。
+
+    每个元数据文件展开为 (文件夹, 键, 值) 行，嵌套 dict 的键用 "." 连接，
+    例如 {"symbols": {"BTC": {"end": "2024-06-01"}}} 得到键 "symbols.BTC.end"。
+    refresh() 只重新读取 mtime 或大小变化的元数据文件，并删除已不存在的。
+
+    >>> catalog = MetaCatalog(Path("/data/lake")).refresh()
+    >>> catalog.find(("symbols.BTC.end", ">", "2024-01-01"))
+    [PosixPath('/data/lake/binance/1h'), ...]
+
+    sqlite 文件默认为 root/.<root名>.catalog.sqlite。
+    """
+
+    OPS = ("=", "!=", "<", "<=", ">", ">=", "like", "in")
+
+    def __init__(
+        self,
+        root: Path,
+        suffix: str = ".meta.json",
+        catalog_path: Path | None = None,
+    ):
+        self.root = Path(root)
+        self.suffix = suffix
+        self.catalog_path = (
+            FolderMeta._get_metadata_path(self.root, ".catalog.sqlite")
+            if catalog_path is None
+            else Path(catalog_path)
+        )
+        self.catalog_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.catalog_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                folder TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS entries (folder TEXT, key TEXT, value);
+            CREATE INDEX IF NOT EXISTS entries_key_value ON entries (key, value);
+            CREATE INDEX IF NOT EXISTS entries_folder ON entries (folder);
+            """)
+
+    def close(self):
+        self.conn.close()
+
+    def _scan(self) -> dict[str, tuple[str, int, int]]:
+        """返回 文件夹相对路径 -> (元数据文件路径, mtime_ns, size)，不进入隐藏目录。"""
+        found = {}
+        stack = [os.fspath(self.root)]
+        while stack:
+            dir = stack.pop()
+            metaname = f".{os.path.basename(dir)}{self.suffix}"
+            try:
+                with os.scandir(dir) as it:
+                    for entry in it:
+                        if entry.name == metaname:
+                            st = entry.stat()
+                            rel = os.path.relpath(dir, self.root)
+                            found["" if rel == "." else rel] = (
+                                entry.path,
+                                st.st_mtime_ns,
+                                st.st_size,
+                            )
+                        elif not entry.name.startswith(".") and entry.is_dir(
+                            follow_symlinks=False
+                        ):
+                            stack.append(entry.path)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+        return found
+
+    def refresh(self) -> "MetaCatalog":
+        known = {
+            folder: (mtime_ns, size)
+            for folder, mtime_ns, size in self.conn.execute(
+                "SELECT folder, mtime_ns, size FROM files"
+            )
+        }
+        found = self._scan()
+        with self.conn:
+            for folder in known.keys() - found.keys():
+                self.conn.execute("DELETE FROM entries WHERE folder = ?", (folder,))
+                self.conn.execute("DELETE FROM files WHERE folder = ?", (folder,))
+            for folder, (path, mtime_ns, size) in found.items():
+                if known.get(folder) == (mtime_ns, size):
+                    continue
+                # 直接读取，不放入 _read_cache，索引大量文件时不会一直占用内存
+                try:
+                    obj = _read_json(Path(path))
+                except (OSError, ValueError) as e:
+                    logging.error(msg=f"Failed to read metadata file {path}: {e}")
+                    continue
+                if obj is None:
+                    continue
+                obj = obj if isinstance(obj, dict) else {}
+                self.conn.execute("DELETE FROM entries WHERE folder = ?", (folder,))
+                self.conn.executemany(
+                    "INSERT INTO entries (folder, key, value) VALUES (?, ?, ?)",
+                    ((folder, k, _sql_value(v)) for k, v in _flatten(obj)),
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files (folder, mtime_ns, size) VALUES (?, ?, ?)",
+                    (folder, mtime_ns, size),
+                )
+        return self
+
+    def find(self, *conditions: tuple[str, str, object]) -> list[Path]:
+        """
+        返回同时满足所有条件的文件夹。条件为 (键, 运算符, 值)，
+        运算符为 =、!=、<、<=、>、>=、like、in(值为序列)。
+        字符串按字典序比较，ISO 格式的日期可以直接比较。
+        """
+        sql = "SELECT folder FROM files"
+        clauses = []
+        params: list = []
+        for key, op, value in conditions:
+            op = op.lower()
+            if op not in self.OPS:
+                raise ValueError(f"op must be one of {self.OPS}, got '{op}'")
+            if op == "in":
+                values = list(value)  # type: ignore[call-overload]
+                placeholder = f"IN ({', '.join('?' * len(values))})"
+            else:
+                values = [value]
+                placeholder = f"{op} ?"
+            clauses.append(
+                f"folder IN (SELECT folder FROM entries WHERE key = ? AND value {placeholder})"
+            )
+            params.extend([key, *(_sql_value(v) for v in values)])
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return [
+            self.root / folder if folder else self.root
+            for (folder,) in self.conn.execute(sql + " ORDER BY folder", params)
+        ]
+
+    def get(self, folder: str | Path) -> dict:
+        """返回某个文件夹展开后的元数据 {点分隔的键: 值}。"""
+        rel = os.fspath(folder)
+        if os.path.isabs(rel):
+            rel = os.path.relpath(rel, self.root)
+        rel = "" if rel == "." else rel
+        return dict(
+            self.conn.execute(
+                "SELECT key, value FROM entries WHERE folder = ?", (rel,)
+            ).fetchall()
+        )
+
+    def to_frame(self):
+        """
+        返回以文件夹为索引、展开后的键为列的 pd.DataFrame。
+        """
+        import pandas as pd
+
+        df = pd.read_sql_query("SELECT folder, key, value FROM entries", self.conn)
+        return df.pivot(index="folder", columns="key", values="value")
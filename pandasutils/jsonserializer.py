@@ -1,16 +1,31 @@
+import base64
+import itertools
 import json
+import math
 import os
+from collections.abc import Callable, Iterable, Iterator
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import TypeVar, cast
+from typing import Any, TypeVar, cast
 
-from cattrs import Converter, unstructure
+from cattrs import Converter
+
+try:
+    import orjson
+except ImportError:  # orjson 是可选依赖，没有安装时使用标准库 json
+    orjson = None
 
 converter = Converter()
 
 
 def datetime_structure_hook(data, T):
-    return datetime.fromisoformat(data)
+    if T is datetime:
+        return datetime.fromisoformat(data)
+    if _is_type(T, "pandas", "Timestamp"):
+        # pd.Timestamp.fromisoformat 会丢掉纳秒
+        return T(data)
+    return T.fromisoformat(data)
 
 
 def timedelta_structure_hook(delta, T):
@@ -32,27 +47,334 @@ converter.register_unstructure_hook(cls=datetime, func=datetime_unstructure_hook
 converter.register_unstructure_hook(cls=timedelta, func=timedelta_unstructure_hook)
 
 
-def dumpstr(obj):
-    obj = unstructure(obj)
+# pandas / numpy 对象的 hook。按模块名和类名匹配类型，
+# 本模块不需要在导入时导入 pandas 和 numpy，只在真正遇到这些对象时才导入。
+#
+# 数组: {"dtype": "float64", "shape": [n], "b64": 小端字节的 base64}
+#       datetime64 / timedelta64 同样按 int64 字节打包，即 epoch 整数；
+#       带时区的时间额外有 "tz"，字节为 UTC 时间；
+#       object 和其他扩展类型: {"dtype": ..., "list": [...]}，缺失值为 null。
+# Index: {"name": ..., "values": 数组} / {"name": ..., "range": [start, stop, step]}
+#        / {"names": [...], "levels": [数组, ...]} (MultiIndex)
+# Series: {"name": ..., "index": Index, "values": 数组}
+# DataFrame: {"columns": Index, "index": Index, "data": [每列的数组, ...]}
+
+
+def _is_type(cl, module: str, name: str) -> bool:
+    return (
+        isinstance(cl, type)
+        and cl.__name__ == name
+        and getattr(cl, "__module__", "").split(".", 1)[0] == module
+    )
+
+
+def _encode_buffer(arr) -> dict:
+    import numpy as np
+
+    arr = np.ascontiguousarray(arr)
+    if arr.dtype.byteorder == ">":
+        arr = arr.astype(arr.dtype.newbyteorder("<"))
+    return {
+        "dtype": str(arr.dtype),
+        "shape": list(arr.shape),
+        "b64": base64.b64encode(arr.reshape(-1).view(np.uint8)).decode("ascii"),
+    }
+
+
+def _decode_buffer(data: dict):
+    import numpy as np
+
+    buf = bytearray(base64.b64decode(data["b64"]))
+    dtype = np.dtype(data["dtype"]).newbyteorder("<")
+    return np.frombuffer(buf, dtype=dtype).reshape(data["shape"])
+
+
+def ndarray_unstructure_hook(val) -> dict:
+    if val.dtype.kind in "biufcmM":
+        return _encode_buffer(val)
+    return {"dtype": str(val.dtype), "shape": list(val.shape), "list": val.tolist()}
+
+
+def ndarray_structure_hook(data: dict, T):
+    import numpy as np
+
+    if "b64" in data:
+        return _decode_buffer(data)
+    return np.array(data["list"], dtype=data["dtype"]).reshape(data["shape"])
+
+
+def _encode_values(values) -> dict:
+    """编码 Series 或 Index 的值。"""
+    import numpy as np
+    import pandas as pd
+
+    dtype = values.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        utc = pd.DatetimeIndex(values).tz_convert("UTC").tz_localize(None)
+        return {**_encode_buffer(utc.to_numpy()), "tz": str(dtype.tz)}
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        return _encode_buffer(values.to_numpy())
+    obj = np.asarray(values, dtype=object)
+    obj[pd.isna(obj)] = None
+    return {"dtype": str(dtype), "list": obj.tolist()}
+
+
+def _decode_values(data: dict):
+    import numpy as np
+    import pandas as pd
+
+    if "b64" in data:
+        arr = _decode_buffer(data)
+        if "tz" in data:
+            return pd.DatetimeIndex(arr).tz_localize("UTC").tz_convert(data["tz"])
+        return arr
+    if data["dtype"] == "object":
+        arr = np.empty(len(data["list"]), dtype=object)
+        arr[:] = data["list"]
+        return arr
+    return pd.array(data["list"], dtype=data["dtype"])
+
+
+def _encode_index(index) -> dict:
+    import pandas as pd
+
+    if isinstance(index, pd.RangeIndex):
+        return {"name": index.name, "range": [index.start, index.stop, index.step]}
+    if isinstance(index, pd.MultiIndex):
+        levels = [
+            _encode_values(index.get_level_values(i)) for i in range(index.nlevels)
+        ]
+        return {"names": list(index.names), "levels": levels}
+    return {"name": index.name, "values": _encode_values(index)}
+
+
+def _decode_index(data: dict):
+    import pandas as pd
+
+    if "range" in data:
+        return pd.RangeIndex(*data["range"], name=data["name"])
+    if "levels" in data:
+        arrays = [_decode_values(level) for level in data["levels"]]
+        return pd.MultiIndex.from_arrays(arrays, names=data["names"])
+    return pd.Index(_decode_values(data["values"]), name=data["name"])
+
+
+def series_unstructure_hook(val) -> dict:
+    return {
+        "name": val.name,
+        "index": _encode_index(val.index),
+        "values": _encode_values(val),
+    }
+
+
+def series_structure_hook(data: dict, T):
+    import pandas as pd
+
+    values = _decode_values(data["values"])
+    if isinstance(values, pd.DatetimeIndex):
+        values = values.array
+    return pd.Series(
+        values, index=_decode_index(data["index"]), name=data["name"], copy=False
+    )
+
+
+def dataframe_unstructure_hook(val) -> dict:
+    return {
+        "columns": _encode_index(val.columns),
+        "index": _encode_index(val.index),
+        "data": [_encode_values(val.iloc[:, i]) for i in range(val.shape[1])],
+    }
+
+
+def dataframe_structure_hook(data: dict, T):
+    import pandas as pd
+
+    columns = [_decode_values(col) for col in data["data"]]
+    columns = [c.array if isinstance(c, pd.DatetimeIndex) else c for c in columns]
+    df = pd.DataFrame(
+        dict(enumerate(columns)), index=_decode_index(data["index"]), copy=False
+    )
+    df.columns = _decode_index(data["columns"])
+    return df
+
+
+def datetime64_unstructure_hook(val) -> str:
+    import numpy as np
+
+    return str(np.datetime_as_string(val))
+
+
+def datetime64_structure_hook(data: str, T):
+    import numpy as np
+
+    return np.datetime64(data)
+
+
+_pandas_hooks = [
+    ("numpy", "ndarray", ndarray_unstructure_hook, ndarray_structure_hook),
+    ("numpy", "datetime64", datetime64_unstructure_hook, datetime64_structure_hook),
+    ("pandas", "Series", series_unstructure_hook, series_structure_hook),
+    ("pandas", "DataFrame", dataframe_unstructure_hook, dataframe_structure_hook),
+]
+for module, name, unstructure_hook, structure_hook in _pandas_hooks:
+    predicate = partial(_is_type, module=module, name=name)
+    converter.register_unstructure_hook_func(predicate, unstructure_hook)
+    converter.register_structure_hook_func(predicate, structure_hook)
+
+
+@lru_cache(maxsize=None)
+def unstructure_fn(cl) -> Callable[[Any], Any]:
+    """
+    按类型缓存 converter 生成的 unstructure 函数。
+    在 converter 上注册新的 hook 之后需要调用 clear_cache()。
+    """
+    return converter.get_unstructure_hook(cl)
+
+
+@lru_cache(maxsize=None)
+def structure_fn(cl) -> Callable[[Any, Any], Any]:
+    """
+    按类型缓存 converter 生成的 structure 函数。
+    在 converter 上注册新的 hook 之后需要调用 clear_cache()。
+    """
+    return converter.get_structure_hook(cl)
+
+
+def clear_cache():
+    unstructure_fn.cache_clear()
+    structure_fn.cache_clear()
+
+
+def _has_nonfinite(obj) -> bool:
+    """obj 中是否有 NaN / ±inf，只进入 dict、list、tuple"""
+    t = type(obj)
+    if t is dict:
+        obj = obj.values()
+    elif t is not list and t is not tuple:
+        return isinstance(obj, float) and not math.isfinite(obj)
+    for v in obj:
+        tv = type(v)
+        if tv is float:
+            # NaN 和 ±inf 减去自身都是 NaN
+            if v - v != 0.0:
+                return True
+        elif (tv is dict or tv is list or tv is tuple) and _has_nonfinite(v):
+            return True
+        elif isinstance(v, float) and not math.isfinite(v):
+            return True
+    return False
+
+
+def dumps(obj, compact: bool = False) -> str:
+    """
+    把已经 unstructure 的对象编码为 JSON 字符串，默认使用标准库 json，缩进为 4 个空格。
+    compact 为 True 时不缩进、不加多余空格，安装了 orjson 时用 orjson 编码。
+
+    orjson 会把 NaN / ±inf 写成 null。输出中有 null 时再检查对象中是否有这些值，
+    有则改用标准库编码，与标准库一样写出 NaN / Infinity，两种后端的结果可以互相读取。
+    """
+    if compact and orjson is not None:
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # 超出 64 位的整数、嵌套过深等 orjson 不支持的情况，交给标准库处理
+            data = None
+        if data is not None and (b"null" not in data or not _has_nonfinite(obj)):
+            return data.decode("utf-8")
+    if compact:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
     return json.dumps(obj, indent=4, ensure_ascii=False)
 
 
-def dump(obj, path: Path | str, objtype=None):
+def loads(s: str | bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # 标准库写出的 NaN / Infinity 不是严格的 JSON，orjson 不接受
+            pass
+    return json.loads(s)
+
+
+def dumpstr(obj, objtype=None, compact: bool = False):
+    objtype = type(obj) if objtype is None else objtype
+    return dumps(unstructure_fn(objtype)(obj), compact=compact)
+
+
+def dump(obj, path: Path | str, objtype=None, compact: bool = False):
     os.makedirs(os.path.dirname(path), exist_ok=True)
+    text = dumpstr(obj, objtype=objtype, compact=compact)
     with open(file=path, mode="w", encoding="utf-8") as f:
-        objtype = type(obj) if objtype is None else objtype
-        obj = converter.unstructure(obj=obj, unstructure_as=objtype)
-        json.dump(obj=obj, fp=f, indent=4, ensure_ascii=False)
+        f.write(text)
 
 
 T = TypeVar("T")
 
 
 def load(path: Path | str, obj_or_cls=dict):
-    with open(file=path, mode="r", encoding="utf-8") as f:
-        ret_obj = json.load(fp=f)
-        cl = obj_or_cls if isinstance(obj_or_cls, type) else type(obj_or_cls)
-        return converter.structure(ret_obj, cl)
+    with open(file=path, mode="rb") as f:
+        ret_obj = loads(f.read())
+    cl = obj_or_cls if isinstance(obj_or_cls, type) else type(obj_or_cls)
+    return structure_fn(cl)(ret_obj, cl)
+
+
+def dump_lines(
+    objs: Iterable,
+    path: Path | str,
+    objtype=None,
+    append: bool = False,
+    batch_size: int = 1000,
+) -> int:
+    """
+    把 objs 逐个 unstructure 后以 JSON lines 格式写入 path，每行一个对象。
+
+    参数:
+    - objtype: 所有对象共用的类型，None 时按每个对象自己的类型。
+    - append: 为 True 时追加到已有文件末尾。
+    - batch_size: 每攒够多少行调用一次 write。
+
+    返回写入的行数。内存占用只与 batch_size 有关。
+    """
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    count = 0
+    batch: list[str] = []
+    with open(file=path, mode="a" if append else "w", encoding="utf-8") as f:
+        for obj in objs:
+            fn = unstructure_fn(type(obj) if objtype is None else objtype)
+            batch.append(dumps(fn(obj), compact=True))
+            if len(batch) >= batch_size:
+                f.write("\n".join(batch) + "\n")
+                count += len(batch)
+                batch.clear()
+        if batch:
+            f.write("\n".join(batch) + "\n")
+            count += len(batch)
+    return count
+
+
+def iter_load(
+    path: Path | str, obj_or_cls=dict, skip: int = 0, limit: int | None = None
+) -> Iterator:
+    """
+    逐行读取 dump_lines 写出的文件，每次 structure 并产出一个对象。
+
+    参数:
+    - skip: 跳过前 skip 行，跳过的行不做解析。
+    - limit: 最多产出多少个对象，None 表示读到文件末尾。
+
+    没有以换行结尾的最后一行视为正在写入的不完整记录，直接忽略。
+    """
+    cl = obj_or_cls if isinstance(obj_or_cls, type) else type(obj_or_cls)
+    fn = structure_fn(cl)
+    with open(file=path, mode="rb") as f:
+        lines = itertools.islice(f, skip, None if limit is None else skip + limit)
+        for line in lines:
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                yield fn(loads(line), cl)
 
 
 def load_type(path: Path | str, t: T):
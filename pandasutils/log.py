@@ -1,19 +1,264 @@
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+import queue
+import sys
+import threading
+import time
+from collections.abc import Hashable
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
 from pathlib import Path
 from typing import Literal
 
+FullPolicy = Literal["drop", "block"]
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    把日志记录放入有界队列，由 QueueListener 在后台线程中格式化并写出。
+
+    队列已满时:
+    - full_policy="drop": 丢弃该记录并累加 dropped 计数，调用线程不会阻塞。
+    - full_policy="block": 阻塞调用线程直到队列有空位。
+    """
+
+    def __init__(self, q: queue.Queue, full_policy: FullPolicy = "drop"):
+        if full_policy not in ("drop", "block"):
+            raise ValueError(
+                f"input full_policy is '{full_policy}', full_policy must be 'drop' or 'block'."
+            )
+        super().__init__(q)
+        self.full_policy = full_policy
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 与父类一样在调用线程中合并 msg 和 args，之后 args 中的可变对象被修改
+        # 也不会影响日志内容；时间、级别等其余格式化和写入仍在后台线程完成。
+        # 复制一份，不影响同一条记录传播到的其他 handler
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.full_policy == "block":
+            self.queue.put(record, block=True)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimiter:
+    """
+    按 key 限流的令牌桶：每个 key 每秒最多放行 rate 条，允许突发 max(rate, 1) 条。
+    """
+
+    def __init__(self):
+        # key -> [剩余令牌, 上次更新时间, 被抑制的条数]
+        self._buckets: dict[Hashable, list] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable, rate: float) -> int | None:
+        """
+        放行时返回自上次放行以来被抑制的条数，不放行时返回 None。
+        """
+        now = time.monotonic()
+        capacity = max(rate, 1.0)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [capacity, now, 0]
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= 1.0:
+                bucket[0] = tokens - 1.0
+                suppressed, bucket[2] = bucket[2], 0
+                return suppressed
+            bucket[0] = tokens
+            bucket[2] += 1
+            return None
+
+
+_ratelimiter = RateLimiter()
+
+
+class AsyncQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # 队列可能已满，阻塞等待后台线程腾出空位，保证剩余记录都能写出
+        self.queue.put(self._sentinel, block=True)
+
+
+# LogRecord 自带的属性，其余属性视为调用方通过 extra 传入的字段
+_RECORD_ATTRS = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__.keys()
+) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    每条记录输出为一行 JSON:
+    {"ts": 毫秒时间戳, "level": ..., "logger": ..., "msg": ..., <extra 字段>..., "exc": 异常信息}
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        obj = {
+            "ts": int(record.created * 1000),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                obj[key] = value
+        if record.exc_info:
+            obj["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            obj["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(obj, ensure_ascii=False, default=str)
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    在内存中缓存格式化后的记录，满足以下任一条件时用一次 write 写入文件:
+    - 缓存的字符数达到 buffer_size；
+    - 缓存中最早的记录已等待 flush_interval 秒(由后台定时器写出，没有新记录时也会写出)；
+    - 记录级别不低于 flush_level。
+    close() 和 logging.shutdown() 时写出剩余记录。
+    """
+
+    def __init__(
+        self,
+        filename: str | Path,
+        buffer_size: int = 64 * 1024,
+        flush_interval: float = 1.0,
+        flush_level: int = logging.ERROR,
+        encoding: str = "utf-8",
+    ):
+        super().__init__(filename, mode="a", encoding=encoding, delay=True)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self._buffer: list[str] = []
+        self._size = 0
+        self._timer: threading.Timer | None = None
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            msg = self.format(record) + self.terminator
+        except Exception:
+            self.handleError(record)
+            return
+        self._buffer.append(msg)
+        self._size += len(msg)
+        if self._size >= self.buffer_size or record.levelno >= self.flush_level:
+            self._write_buffer()
+        elif self._timer is None:
+            # 缓存从空变为非空时启动定时器，最多 flush_interval 秒后写出
+            self._timer = threading.Timer(max(self.flush_interval, 0.0), self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _write_buffer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._buffer:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write("".join(self._buffer))
+            self.stream.flush()
+            self._buffer.clear()
+            self._size = 0
+
+    def flush(self):
+        self.acquire()
+        try:
+            self._write_buffer()
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        super().close()
+
 
 class Log:
     formatter = logging.Formatter(
         "[%(asctime)s] [%(levelname)s] %(message)s", "%Y-%m-%d %H:%M:%S"
     )
+    jsonformatter = JsonFormatter()
 
-    def __init__(self, name="", path=""):
+    def __init__(
+        self,
+        name="",
+        path="",
+        async_: bool = False,
+        queue_size: int = 10000,
+        full_policy: FullPolicy = "drop",
+    ):
+        """
+        参数:
+        - name: logger 名称。
+        - path: 文件 handler 的默认路径。
+        - async_: 为 True 时，所有 handler 挂在后台 QueueListener 上，
+          调用线程只负责把记录放入有界队列，格式化、写入和 rollover 都在后台线程完成。
+        - queue_size: 异步模式下队列的容量。
+        - full_policy: 异步模式下队列已满时的策略，"drop" 丢弃并计数，"block" 阻塞等待。
+
+        注意: 记录仍会按 logging 的规则传播到父 logger，父 logger 上的 handler
+        在调用线程中执行；不需要时设置 self.logger.propagate = False。
+        """
         self.name = name
         self.path = path
         self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.DEBUG)
+        self.queue_handler: AsyncQueueHandler | None = None
+        self.listener: AsyncQueueListener | None = None
+        if async_:
+            q = queue.Queue(maxsize=queue_size)
+            self.queue_handler = AsyncQueueHandler(q, full_policy=full_policy)
+            self.listener = AsyncQueueListener(q, respect_handler_level=True)
+            self.logger.addHandler(self.queue_handler)
+            self.listener.start()
+            atexit.register(self.stop)
+
+    @property
+    def dropped(self) -> int:
+        """异步模式下因队列已满而丢弃的记录数。"""
+        return 0 if self.queue_handler is None else self.queue_handler.dropped
+
+    def stop(self):
+        """
+        停止后台线程：先处理完队列中剩余的记录，再 flush 所有 handler。
+        停止后 handler 直接挂回 logger，之后的记录在调用线程中同步写出。可重复调用。
+        """
+        if self.listener is not None:
+            self.logger.removeHandler(self.queue_handler)
+            self.listener.stop()
+            for h in self.listener.handlers:
+                self.logger.addHandler(h)
+            if self.dropped > 0:
+                self.logger.warning(
+                    "%d log records dropped because the queue was full", self.dropped
+                )
+            self.listener = None
+            atexit.unregister(self.stop)
+        for h in self._handlers():
+            h.flush()
+
+    def _handlers(self) -> tuple[logging.Handler, ...]:
+        if self.listener is not None:
+            return self.listener.handlers
+        return tuple(self.logger.handlers)
 
     def _has_handleroftype(self, handler_type: type):
         """
@@ -26,9 +271,7 @@ class Log:
         - 如果已经存在一个特定类型的handler，则返回True；否则返回False。
         """
 
-        return any(
-            isinstance(handler, handler_type) for handler in self.logger.handlers
-        )
+        return any(isinstance(handler, handler_type) for handler in self._handlers())
 
     def _getpath(self, file_path):
         file_path = str(file_path).strip()
@@ -36,10 +279,18 @@ class Log:
             return self.path
         return file_path
 
-    def _sethander(self, h: logging.Handler, level=logging.DEBUG):
-        h.setFormatter(Log.formatter)
+    def _sethander(
+        self,
+        h: logging.Handler,
+        level=logging.DEBUG,
+        formatter: logging.Formatter | None = None,
+    ):
+        h.setFormatter(Log.formatter if formatter is None else formatter)
         h.setLevel(level)
-        self.logger.addHandler(h)
+        if self.listener is not None:
+            self.listener.handlers = self.listener.handlers + (h,)
+        else:
+            self.logger.addHandler(h)
 
     def addCMDloging(self, level=logging.DEBUG):
         if self._has_handleroftype(logging.StreamHandler):
@@ -117,43 +368,182 @@ class Log:
         self._sethander(h, level)
         return self
 
-    def info(self, msg, *args, stack_info: bool = False, stacklevel: int = 1):
-        self.logger.info(msg=msg, *args, stack_info=stack_info, stacklevel=stacklevel)
-
-    def debug(self, msg, *args, stack_info: bool = False, stacklevel: int = 1):
-        self.logger.debug(msg=msg, *args, stack_info=stack_info, stacklevel=stacklevel)
-
-    def warning(self, msg, *args, stack_info: bool = False, stacklevel: int = 1):
-        self.logger.warning(msg=msg, *args, stack_info=stack_info, stacklevel=stacklevel)
-
-    def error(self, msg, *args, stack_info: bool = False, stacklevel: int = 1):
-        self.logger.error(msg=msg, *args, stack_info=stack_info, stacklevel=stacklevel)
+    def addBufferedFilelogging(
+        self,
+        path: str | Path,
+        buffer_size: int = 64 * 1024,
+        flush_interval: float = 1.0,
+        flush_level: int = logging.ERROR,
+        json_lines: bool = False,
+        level=logging.DEBUG,
+    ):
+        """
+        添加 BufferedFileHandler：记录先缓存在内存中，按大小、时间间隔或
+        ERROR 级别批量写入，减少每条记录一次的系统调用。不做 rollover。
 
-    def critical(self, msg, *args, stack_info: bool = False, stacklevel: int = 1):
-        self.logger.critical(
-            msg=msg, *args, stack_info=stack_info, stacklevel=stacklevel
+        json_lines 为 True 时使用 JsonFormatter，每行一个 JSON 对象，
+        通过 extra 传入的字段会作为额外的键写出。
+        """
+        if self._has_handleroftype(BufferedFileHandler):
+            return self
+        path = self._getpath(path)
+        h = BufferedFileHandler(
+            filename=path,
+            buffer_size=buffer_size,
+            flush_interval=flush_interval,
+            flush_level=flush_level,
         )
+        self._sethander(h, level, Log.jsonformatter if json_lines else None)
+        return self
 
+    def isEnabledFor(self, level: int) -> bool:
+        """
+        logger 是否会处理该级别的记录，结果由 logging 缓存。
+        在热循环中可以先判断再构造昂贵的消息。
+        """
+        return self.logger.isEnabledFor(level)
 
-logger = Log()
-logger.addCMDloging()  # .addTimedRotatingFilelogging(when='D')
+    def _log(self, level, msg, args, stack_info, stacklevel, ratelimit):
+        """
+        级别检查之后的公共路径，只能由 info/debug/... 直接调用，
+        调用位置固定在向上第 2 层栈帧。
+        """
+        suppressed = 0
+        if ratelimit is not None:
+            caller = sys._getframe(2)
+            suppressed = _ratelimiter.acquire(
+                (caller.f_code, caller.f_lineno), ratelimit
+            )
+            if suppressed is None:
+                return
+        if callable(msg):
+            msg = msg()
+        if suppressed:
+            msg = f"{msg} [{suppressed} similar messages suppressed]"
+        # 跳过 _log 和 info/debug/... 两层，让记录指向真正的调用者
+        self.logger._log(
+            level, msg, args, stack_info=stack_info, stacklevel=stacklevel + 2
+        )
 
+    def info(
+        self,
+        msg,
+        *args,
+        stack_info: bool = False,
+        stacklevel: int = 1,
+        ratelimit: float | None = None,
+    ):
+        """
+        级别未启用时只做一次缓存的 isEnabledFor 检查就返回。
 
-def info(msg, *args, stack_info: bool = False, stacklevel: int = 1):
-    logger.info(msg=msg, *args, stack_info=stack_info, stacklevel=stacklevel)
+        - msg: 消息字符串，或无参数的可调用对象(只在级别启用时才调用，用于延迟构造消息)。
+        - args: %-style 参数，只在真正输出时才格式化。
+        - stacklevel: 与 logging 相同，1 表示调用本方法的位置。
+        - ratelimit: 每秒最多输出的条数，按调用位置(文件和行号)分别限流，
+          被抑制的条数会附加在下一条输出的消息后面。
+        """
+        if self.logger.isEnabledFor(logging.INFO):
+            self._log(logging.INFO, msg, args, stack_info, stacklevel, ratelimit)
 
+    def debug(
+        self,
+        msg,
+        *args,
+        stack_info: bool = False,
+        stacklevel: int = 1,
+        ratelimit: float | None = None,
+    ):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._log(logging.DEBUG, msg, args, stack_info, stacklevel, ratelimit)
 
-def debug(msg, *args, stack_info: bool = False, stacklevel: int = 1):
-    logger.debug(msg=msg, *args, stack_info=stack_info, stacklevel=stacklevel)
+    def warning(
+        self,
+        msg,
+        *args,
+        stack_info: bool = False,
+        stacklevel: int = 1,
+        ratelimit: float | None = None,
+    ):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._log(logging.WARNING, msg, args, stack_info, stacklevel, ratelimit)
 
+    def error(
+        self,
+        msg,
+        *args,
+        stack_info: bool = False,
+        stacklevel: int = 1,
+        ratelimit: float | None = None,
+    ):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, msg, args, stack_info, stacklevel, ratelimit)
 
-def warning(msg, *args, stack_info: bool = False, stacklevel: int = 1):
-    logger.warning(msg=msg, *args, stack_info=stack_info, stacklevel=stacklevel)
+    def critical(
+        self,
+        msg,
+        *args,
+        stack_info: bool = False,
+        stacklevel: int = 1,
+        ratelimit: float | None = None,
+    ):
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self._log(logging.CRITICAL, msg, args, stack_info, stacklevel, ratelimit)
 
 
-def error(msg, *args, stack_info: bool = False, stacklevel: int = 1):
-    logger.error(msg=msg, *args, stack_info=stack_info, stacklevel=stacklevel)
+logger = Log()
+logger.addCMDloging()  # .addTimedRotatingFilelogging(when='D')
 
 
-def critical(msg, *args, stack_info: bool = False, stacklevel: int = 1):
-    logger.critical(msg=msg, *args, stack_info=stack_info, stacklevel=stacklevel)
+def info(
+    msg,
+    *args,
+    stack_info: bool = False,
+    stacklevel: int = 1,
+    ratelimit: float | None = None,
+):
+    if logger.logger.isEnabledFor(logging.INFO):
+        logger._log(logging.INFO, msg, args, stack_info, stacklevel, ratelimit)
+
+
+def debug(
+    msg,
+    *args,
+    stack_info: bool = False,
+    stacklevel: int = 1,
+    ratelimit: float | None = None,
+):
+    if logger.logger.isEnabledFor(logging.DEBUG):
+        logger._log(logging.DEBUG, msg, args, stack_info, stacklevel, ratelimit)
+
+
+def warning(
+    msg,
+    *args,
+    stack_info: bool = False,
+    stacklevel: int = 1,
+    ratelimit: float | None = None,
+):
+    if logger.logger.isEnabledFor(logging.WARNING):
+        logger._log(logging.WARNING, msg, args, stack_info, stacklevel, ratelimit)
+
+
+def error(
+    msg,
+    *args,
+    stack_info: bool = False,
+    stacklevel: int = 1,
+    ratelimit: float | None = None,
+):
+    if logger.logger.isEnabledFor(logging.ERROR):
+        logger._log(logging.ERROR, msg, args, stack_info, stacklevel, ratelimit)
+
+
+def critical(
+    msg,
+    *args,
+    stack_info: bool = False,
+    stacklevel: int = 1,
+    ratelimit: float | None = None,
+):
+    if logger.logger.isEnabledFor(logging.CRITICAL):
+        logger._log(logging.CRITICAL, msg, args, stack_info, stacklevel, ratelimit)
@@ -1,17 +1,46 @@
 import os
 import re
 import shutil
+import threading
+import time
+from collections.abc import AsyncIterator, Collection, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Literal
+from typing import Literal, NamedTuple
+
+from .foldermeta import FolderMeta
+
+FileDirType = Literal["dir", "file", "all"]
 
 
 def curdir() -> Path:
     return Path.cwd()
 
 
+# 本进程中已确认存在的目录(绝对路径)，create_dir / ensure_dirs 命中后不再访问文件系统。
+# 只有通过 delete_dir 删除的目录会被移出；被其他途径删除时调用 clear_dir_cache()
+_known_dirs: set[str] = set()
+_known_dirs_lock = threading.Lock()
+
+
+def _remember_dirs(dirs):
+    with _known_dirs_lock:
+        _known_dirs.update(dirs)
+
+
+def clear_dir_cache():
+    with _known_dirs_lock:
+        _known_dirs.clear()
+
+
 def create_dir(*path_components: str | Path) -> Path:
     # 将传入的路径片段组合成一个Path对象
     p = Path(*path_components)
+    key = os.path.abspath(p)
+    if key in _known_dirs:
+        return p
+    if p.suffix and os.path.dirname(key) in _known_dirs:
+        return p
     if not p.exists():
         # 路径不存在，判断是否是文件路径
         if p.suffix:  # 如果路径包含后缀，则假设它是文件
@@ -20,15 +49,40 @@ def create_dir(*path_components: str | Path) -> Path:
             dir = p
         if not dir.exists():
             dir.mkdir(parents=True, exist_ok=True)
+        _remember_dirs((os.path.abspath(dir),))
+    elif p.suffix:
+        _remember_dirs((os.path.dirname(key),))
+    else:
+        _remember_dirs((key,))
     return p
 
 
+def ensure_dirs(paths: Iterable[str | Path]) -> list[str]:
+    """
+    批量确保文件路径的父目录存在。相同的父目录只处理一次，
+    已知存在的目录直接跳过，其余按路径排序后依次 mkdir。
+
+    返回本次调用中实际访问了文件系统的目录。
+    """
+    parents = {os.path.dirname(os.path.abspath(p)) for p in paths}
+    missing = sorted(parents - _known_dirs)
+    for dir in missing:
+        os.makedirs(dir, exist_ok=True)
+    _remember_dirs(missing)
+    return missing
+
+
 def delete_dir(folder_path: Path | str):
 
     # 判断文件夹是否存在
     if os.path.exists(folder_path):
         # 删除文件夹及其所有内容
         shutil.rmtree(folder_path)
+    key = os.path.abspath(folder_path)
+    prefix = os.path.join(key, "")
+    with _known_dirs_lock:
+        stale = [d for d in _known_dirs if d == key or d.startswith(prefix)]
+        _known_dirs.difference_update(stale)
 
 
 def convert_lowstr(s: str):
@@ -62,9 +116,12 @@ def get_paths(
     dir: Path,
     pattern: str = "**/*",
     include_hidden: bool = False,
-    filedirtype: Literal["dir", "file", "all"] = "all",
+    filedirtype: FileDirType = "all",
 ):
     """
+    pattern 为默认的 "**/*" 时等价于 list(iter_paths(dir, include_hidden, filedirtype))，
+    隐藏文件/目录只按 dir 之下的部分判断。
+
     Path.glob(pattern)
     解析相对于此路径的通配符 pattern,产生所有匹配的文件:
 
@@ -93,6 +150,12 @@ def get_paths(
     '[]' '[!]'	匹配指定范围内的字符，比如：[0-9]匹配数字，[a-z]匹配小写字母
     """
 
+    if pattern == "**/*":
+        # 默认模式走 os.scandir，隐藏目录在进入之前就被跳过
+        return list(
+            iter_paths(dir, include_hidden=include_hidden, filedirtype=filedirtype)
+        )
+
     all_paths = dir.glob(pattern)
     filtered_paths = []
 
@@ -118,6 +181,108 @@ def get_paths(
     return filtered_paths
 
 
+def _scandir(
+    path: str,
+    depth: int,
+    include_hidden: bool,
+    exclude: Collection[str],
+    max_depth: int | None,
+):
+    """
+    扫描单个目录，返回 (条目, 待进入的子目录)。
+    条目为 (路径, 是否目录, 是否文件)，类型信息直接取自 DirEntry，不再额外 stat。
+    """
+    entries: list[tuple[str, bool, bool]] = []
+    subdirs: list[tuple[str, int]] = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                name = entry.name
+                if not include_hidden and name.startswith("."):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                    is_file = not is_dir and entry.is_file()
+                except OSError:
+                    is_dir = is_file = False
+                if is_dir:
+                    if name in exclude:
+                        continue
+                    # 与 Path.glob("**") 一致，不进入指向目录的符号链接
+                    descend = max_depth is None or depth < max_depth
+                    if descend and not entry.is_symlink():
+                        subdirs.append((entry.path, depth + 1))
+                entries.append((entry.path, is_dir, is_file))
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        pass
+    return entries, subdirs
+
+
+def iter_paths(
+    dir: str | Path,
+    include_hidden: bool = False,
+    filedirtype: FileDirType = "all",
+    max_depth: int | None = None,
+    suffixes: Collection[str] | None = None,
+    exclude: Collection[str] = (),
+    workers: int | None = None,
+) -> Iterator[Path]:
+    """
+    基于 os.scandir 递归遍历 dir 下的所有文件和目录(不含 dir 本身)，边遍历边产出 Path。
+
+    参数:
+    - include_hidden: 为 False 时跳过以 "." 开头的文件，隐藏目录不会被进入。
+    - filedirtype: "all"、"dir" 或 "file"。
+    - max_depth: 最大深度，1 表示只列出 dir 的直接子项，None 表示不限。
+    - suffixes: 只产出名称以这些后缀结尾的条目，例如 (".csv", ".parquet")，不区分大小写。
+    - exclude: 不进入、也不产出的目录名，例如 ("__pycache__", "node_modules")。
+    - workers: 大于 1 时用线程池并发扫描子目录，适合网络文件系统；
+      此时产出顺序不固定。
+    """
+    if filedirtype not in ("all", "dir", "file"):
+        raise TypeError(
+            f"input type is '{filedirtype}', filedirtype must be 'all', 'dir' or 'file'."
+        )
+    exclude = frozenset(exclude)
+    suffix_tuple = tuple(s.lower() for s in suffixes) if suffixes else None
+
+    def _select(entries: list[tuple[str, bool, bool]]):
+        for path, is_dir, is_file in entries:
+            if filedirtype == "dir" and not is_dir:
+                continue
+            if filedirtype == "file" and not is_file:
+                continue
+            if suffix_tuple is not None and not path.lower().endswith(suffix_tuple):
+                continue
+            yield Path(path)
+
+    root = os.fspath(dir)
+    if workers is None or workers <= 1:
+        stack = [(root, 1)]
+        while stack:
+            path, depth = stack.pop()
+            entries, subdirs = _scandir(path, depth, include_hidden, exclude, max_depth)
+            yield from _select(entries)
+            stack.extend(reversed(subdirs))
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: set[Future] = {
+            executor.submit(_scandir, root, 1, include_hidden, exclude, max_depth)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entries, subdirs = future.result()
+                for path, depth in subdirs:
+                    pending.add(
+                        executor.submit(
+                            _scandir, path, depth, include_hidden, exclude, max_depth
+                        )
+                    )
+                yield from _select(entries)
+
+
 def getsubdir(path: str | Path):
     path = Path(path)
     for entry in path.iterdir():
@@ -133,6 +298,163 @@ def getsubfiles(path: str | Path):
             yield entry
 
 
+class DirCache:
+    """
+    目录列表缓存，用于反复扫描同一棵大目录树。
+
+    每个目录缓存 (mtime, 子目录, 文件)。refresh() 时仍会 stat 每个目录，
+    但只有 mtime 变化的目录才会重新 scandir。目录的 mtime 只在其中的条目
+    新增、删除或改名时变化，文件内容被修改不会使缓存失效。
+
+    缓存通过 FolderMeta 保存在 path，默认为 root 的父目录下的 .<root名>.dircache.json，
+    进程重启后继续使用；persist=False 时只保存在内存中。
+    默认位置不可写(只读或属于其他用户)时也只保存在内存中。
+    缓存文件(以及写入时的临时文件和 .lock 文件)放在扫描的目录树之外，
+    否则每次写入都会改变所在目录的 mtime，使下一次 refresh() 重新列出该目录并再次写入。
+
+    >>> cache = DirCache(Path("/data/lake"))
+    >>> cache.refresh().get_paths(filedirtype="file")
+    """
+
+    # mtime 距现在不足该秒数的目录不信任其 mtime，下次 refresh 时重新扫描，
+    # 避免同一时间戳内的后续修改被漏掉
+    UNSTABLE_SECONDS = 2.0
+
+    def __init__(
+        self,
+        root: str | Path,
+        include_hidden: bool = False,
+        exclude: Collection[str] = (),
+        persist: bool = True,
+        suffix: str = ".dircache.json",
+        path: str | Path | None = None,
+    ):
+        self.root = Path(root)
+        self.include_hidden = include_hidden
+        self.exclude = frozenset(exclude)
+        self.meta: FolderMeta | None = None
+        # 使用默认位置时，写不进去就退化为只保存在内存中；显式给出的 path 写入失败时抛出异常
+        self._memory_fallback = path is None
+        if persist and path is None:
+            base = Path(os.path.abspath(self.root))
+            path = base.parent / f".{base.name}{suffix}"
+            persist = os.access(path.parent, os.W_OK) and (
+                not path.exists() or os.access(path, os.W_OK)
+            )
+        if persist:
+            path = Path(path)
+            self.meta = FolderMeta(path.parent, suffix=suffix)
+            self.meta.path = path
+        # 相对路径 -> {"mtime": ns, "dirs": [...], "links": [...], "files": [...]}
+        # links 是指向目录的符号链接，与 iter_paths 一致，不进入
+        self.dirs: dict[str, dict] = {}
+        if self.meta is not None and self.meta.path.exists():
+            self.meta.load()
+            # 过滤条件不同的缓存不能复用
+            same_filter = self.meta.get("include_hidden") == include_hidden
+            same_filter &= self.meta.get("exclude") == sorted(self.exclude)
+            if same_filter:
+                self.dirs = self.meta.get("dirs", {})
+
+    def _list(self, path: str, mtime: int) -> dict:
+        listing: dict = {"mtime": mtime, "dirs": [], "links": [], "files": []}
+        with os.scandir(path) as it:
+            for entry in it:
+                name = entry.name
+                if not self.include_hidden and name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir():
+                        if name in self.exclude:
+                            continue
+                        key = "links" if entry.is_symlink() else "dirs"
+                        listing[key].append(name)
+                    elif entry.is_file():
+                        listing["files"].append(name)
+                except OSError:
+                    continue
+        return listing
+
+    def refresh(self) -> "DirCache":
+        """
+        重新同步缓存，只重新列出 mtime 变化的目录，返回 self。
+        """
+        unstable_ns = time.time_ns() - int(self.UNSTABLE_SECONDS * 1e9)
+        old = self.dirs
+        new: dict[str, dict] = {}
+        changed = False
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            path = os.path.join(self.root, rel) if rel else os.fspath(self.root)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                changed = True
+                continue
+            listing = old.get(rel)
+            if listing is None or listing["mtime"] != mtime:
+                try:
+                    listing = self._list(path, mtime)
+                except (FileNotFoundError, NotADirectoryError, PermissionError):
+                    changed = True
+                    continue
+                if mtime > unstable_ns:
+                    listing["mtime"] = -1
+                changed = True
+            new[rel] = listing
+            stack.extend(os.path.join(rel, name) for name in listing["dirs"])
+        changed = changed or len(new) != len(old)
+        self.dirs = new
+        if changed and self.meta is not None:
+            self.meta.clear()
+            self.meta["include_hidden"] = self.include_hidden
+            self.meta["exclude"] = sorted(self.exclude)
+            self.meta["dirs"] = new
+            try:
+                self.meta.dump()
+            except OSError:
+                if not self._memory_fallback:
+                    raise
+                self.meta = None
+        return self
+
+    def _listing(self, path: str | Path) -> dict:
+        rel = os.path.relpath(path, self.root)
+        return self.dirs.get("" if rel == "." else rel, {})
+
+    def get_paths(self, filedirtype: FileDirType = "all") -> list[Path]:
+        """
+        与 get_paths(root, "**/*", include_hidden, filedirtype) 相同的结果，取自缓存。
+        """
+        if filedirtype not in ("all", "dir", "file"):
+            raise TypeError(
+                f"input type is '{filedirtype}', filedirtype must be 'all', 'dir' or 'file'."
+            )
+        keys = {
+            "all": ("dirs", "links", "files"),
+            "dir": ("dirs", "links"),
+            "file": ("files",),
+        }[filedirtype]
+        paths = []
+        for rel, listing in self.dirs.items():
+            parent = self.root / rel if rel else self.root
+            for key in keys:
+                paths.extend(parent / name for name in listing[key])
+        return paths
+
+    def getsubdir(self, path: str | Path):
+        path = Path(path)
+        listing = self._listing(path)
+        for name in (*listing.get("dirs", ()), *listing.get("links", ())):
+            yield path / name
+
+    def getsubfiles(self, path: str | Path):
+        path = Path(path)
+        for name in self._listing(path).get("files", ()):
+            yield path / name
+
+
 def sanitize_filename(filename: str, repl="_"):
     """
     Args:
@@ -148,82 +470,150 @@ def sanitize_filename(filename: str, repl="_"):
     return new_filename
 
 
-# # 文件夹监控线程
-# def monitor_folder(path_to_watch: Path, envethandler):
-#     '''
-#     class FolderMonitorHandler(FileSystemEventHandler):
-
-#     def on_moved(self, event: DirMovedEvent | FileMovedEvent) -> None:
-#         """Called when a file or a directory is moved or renamed.
-
-#         :param event:
-#             Event representing file/directory movement.
-#         :type event:
-#             :class:`DirMovedEvent` or :class:`FileMovedEvent`
-#         """
-
-#     def on_created(self, event: DirCreatedEvent | FileCreatedEvent) -> None:
-#         """Called when a file or directory is created.
-
-#         :param event:
-#             Event representing file/directory creation.
-#         :type event:
-#             :class:`DirCreatedEvent` or :class:`FileCreatedEvent`
-#         """
-
-#     def on_deleted(self, event: DirDeletedEvent | FileDeletedEvent) -> None:
-#         """Called when a file or directory is deleted.
-
-#         :param event:
-#             Event representing file/directory deletion.
-#         :type event:
-#             :class:`DirDeletedEvent` or :class:`FileDeletedEvent`
-#         """
-
-#     def on_modified(self, event: DirModifiedEvent | FileModifiedEvent) -> None:
-#         """Called when a file or directory is modified.
-
-#         :param event:
-#             Event representing file/directory modification.
-#         :type event:
-#             :class:`DirModifiedEvent` or :class:`FileModifiedEvent`
-#         """
-
-#     def on_closed(self, event: FileClosedEvent) -> None:
-#         """Called when a file opened for writing is closed.
-
-#         :param event:
-#             Event representing file closing.
-#         :type event:
-#             :class:`FileClosedEvent`
-#         """
-
-#     def on_closed_no_write(self, event: FileClosedNoWriteEvent) -> None:
-#         """Called when a file opened for reading is closed.
-
-#         :param event:
-#             Event representing file closing.
-#         :type event:
-#             :class:`FileClosedNoWriteEvent`
-#         """
-
-#     def on_opened(self, event: FileOpenedEvent) -> None:
-#         """Called when a file is opened.
-
-#         :param event:
-#             Event representing file opening.
-#         :type event:
-#             :class:`FileOpenedEvent`
-#         """
-#     '''
-#     event_handler = envethandler()
-#     observer = Observer()
-#     observer.schedule(event_handler, path=str(path_to_watch), recursive=True)
-#     observer.start()
-#     print(f"正在监控文件夹: {path_to_watch}")
-#     try:
-#         while True:
-#             time.sleep(1)
-#     except KeyboardInterrupt:
-#         observer.stop()
-#     observer.join()
+# 文件快照: 路径 -> (大小, mtime 纳秒)
+Snapshot = dict[str, tuple[int, int]]
+
+
+class FolderChanges(NamedTuple):
+    created: list[Path]
+    modified: list[Path]
+    deleted: list[Path]
+
+    def __bool__(self):
+        return bool(self.created or self.modified or self.deleted)
+
+
+def snapshot(
+    dir: str | Path,
+    include_hidden: bool = False,
+    suffixes: Collection[str] | None = None,
+    exclude: Collection[str] = (),
+) -> Snapshot:
+    """
+    记录 dir 下所有文件的 (大小, mtime)，遍历规则与 iter_paths 相同。
+    """
+    exclude = frozenset(exclude)
+    suffix_tuple = tuple(s.lower() for s in suffixes) if suffixes else None
+    result: Snapshot = {}
+    stack = [os.fspath(dir)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    name = entry.name
+                    if not include_hidden and name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir():
+                            if name not in exclude and not entry.is_symlink():
+                                stack.append(entry.path)
+                            continue
+                        if suffix_tuple is not None and not name.lower().endswith(
+                            suffix_tuple
+                        ):
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    result[entry.path] = (st.st_size, st.st_mtime_ns)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+    return result
+
+
+def diff_snapshot(old: Snapshot, new: Snapshot) -> FolderChanges:
+    """
+    比较两次快照。相同时只做一次 dict 比较；不同时用集合运算求差异，不逐项循环比较。
+    """
+    if old == new:
+        return FolderChanges([], [], [])
+    created_keys = new.keys() - old.keys()
+    changed = {path for path, _ in new.items() - old.items()}
+    return FolderChanges(
+        created=[Path(p) for p in sorted(created_keys)],
+        modified=[Path(p) for p in sorted(changed - created_keys)],
+        deleted=[Path(p) for p in sorted(old.keys() - new.keys())],
+    )
+
+
+class FolderMonitor:
+    """
+    轮询式文件夹监控，不依赖 watchdog。
+
+    每 interval 秒做一次快照并与上次比较，只产出非空的 FolderChanges 批次。
+    同步和异步两种用法:
+
+    >>> for changes in FolderMonitor(path, interval=5):
+    ...     for p in changes.created + changes.modified:
+    ...         reload(p)
+
+    >>> async for changes in FolderMonitor(path, interval=5):
+    ...     ...
+
+    异步用法中快照在线程池中执行，不阻塞事件循环。
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        interval: float = 1.0,
+        include_hidden: bool = False,
+        suffixes: Collection[str] | None = None,
+        exclude: Collection[str] = (),
+    ):
+        self.path = Path(path)
+        self.interval = interval
+        self.include_hidden = include_hidden
+        self.suffixes = suffixes
+        self.exclude = exclude
+        self.last: Snapshot = self._snapshot()
+
+    def _snapshot(self) -> Snapshot:
+        return snapshot(self.path, self.include_hidden, self.suffixes, self.exclude)
+
+    def _update(self, new: Snapshot) -> FolderChanges:
+        changes = diff_snapshot(self.last, new)
+        self.last = new
+        return changes
+
+    def poll(self) -> FolderChanges:
+        """
+        立即做一次快照，返回与上次快照相比的变化(可能为空)。
+        """
+        return self._update(self._snapshot())
+
+    def __iter__(self) -> Iterator[FolderChanges]:
+        while True:
+            time.sleep(self.interval)
+            changes = self.poll()
+            if changes:
+                yield changes
+
+    async def __aiter__(self) -> AsyncIterator[FolderChanges]:
+        # asyncio 导入较慢，只在异步监控时导入
+        import asyncio
+
+        while True:
+            await asyncio.sleep(self.interval)
+            changes = self._update(await asyncio.to_thread(self._snapshot))
+            if changes:
+                yield changes
+
+
+def monitor_folder(
+    path_to_watch: str | Path,
+    interval: float = 1.0,
+    include_hidden: bool = False,
+    suffixes: Collection[str] | None = None,
+    exclude: Collection[str] = (),
+) -> FolderMonitor:
+    """
+    创建 FolderMonitor，用 for / async for 遍历得到文件的新增、修改和删除批次。
+    """
+    return FolderMonitor(
+        path_to_watch,
+        interval=interval,
+        include_hidden=include_hidden,
+        suffixes=suffixes,
+        exclude=exclude,
+    )
@@ -0,0 +1,228 @@
+"""
+dfutil 和 timeutil 公共函数的耗时统计。
+
+默认关闭，关闭时模块中的函数就是原函数，没有任何额外开销。
+enable() 会把 dfutil、timeutil 中的公共函数替换成带计时的包装函数，
+disable() 恢复原函数。统计的是包含内部调用的耗时(inclusive)，
+例如 search_timeidx 的耗时也包含了它调用 to_utctz 的耗时。
+
+>>> from pandasutils import profile
+>>> with profile.profiling() as p:
+...     df = dfutil.readpd("data.parquet")
+...     df = timeutil.to_tz(df, "UTC")
+>>> p.to_frame()
+>>> p.report()  # 通过 log.Log 输出汇总表
+"""
+
+import functools
+import inspect
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from types import ModuleType
+
+import numpy as np
+import pandas as pd
+
+from . import dfutil, log, timeutil
+
+PROFILED_MODULES: tuple[ModuleType, ...] = (dfutil, timeutil)
+
+# 每个函数最多保留的耗时样本数，超过后做蓄水池抽样，用于估计 p50 / p99
+MAX_SAMPLES = 100_000
+
+
+class _FuncStats:
+    __slots__ = ("calls", "total_ns", "rows", "bytes", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.rows = 0
+        self.bytes = 0
+        self.samples: list[int] = []
+
+    def add(self, elapsed_ns: int, rows: int, nbytes: int):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.rows += rows
+        self.bytes += nbytes
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(elapsed_ns)
+        else:
+            i = random.randrange(self.calls)
+            if i < MAX_SAMPLES:
+                self.samples[i] = elapsed_ns
+
+
+class Profile:
+    """
+    一次统计的结果，按函数名汇总调用次数、耗时、处理行数和内存分配。
+
+    trace_memory 为 True 时使用 tracemalloc 统计每次调用前后的内存净增量，
+    tracemalloc 本身开销较大，只在需要时打开。
+    """
+
+    columns = ["calls", "total_ms", "mean_ms", "p50_ms", "p99_ms", "rows", "bytes"]
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stats: dict[str, _FuncStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed_ns: int, rows: int, nbytes: int):
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = _FuncStats()
+            stats.add(elapsed_ns, rows, nbytes)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        返回以函数名为索引、按 total_ms 降序排列的汇总表。
+        """
+        with self._lock:
+            rows = []
+            names = []
+            for name, s in self.stats.items():
+                samples = np.asarray(s.samples, dtype=np.float64) / 1e6
+                p50, p99 = np.percentile(samples, [50, 99])
+                total_ms = s.total_ns / 1e6
+                rows.append(
+                    [s.calls, total_ms, total_ms / s.calls, p50, p99, s.rows, s.bytes]
+                )
+                names.append(name)
+        df = pd.DataFrame(
+            rows, index=pd.Index(names, name="function"), columns=self.columns
+        )
+        return df.sort_values("total_ms", ascending=False)
+
+    def report(self, logger: log.Log | None = None) -> pd.DataFrame:
+        """
+        通过 log.Log 以 INFO 级别输出汇总表，默认使用 log.logger，并返回汇总表。
+        """
+        df = self.to_frame()
+        logger = log.logger if logger is None else logger
+        logger.info(lambda: "profile summary\n" + df.to_string(float_format="%.3f"))
+        return df
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+
+_profile = Profile()
+_originals: dict[tuple[ModuleType, str], object] = {}
+# tracemalloc 是否由 enable() 启动，只停止自己启动的 tracemalloc
+_owns_tracemalloc = False
+
+
+def _count_rows(result, args) -> int:
+    for obj in (result, *args):
+        if isinstance(obj, pd.DataFrame | pd.Series | pd.Index | np.ndarray):
+            return len(obj)
+    return 0
+
+
+def _wrap(name: str, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _profile
+        before = tracemalloc.get_traced_memory()[0] if profile.trace_memory else 0
+        start = time.perf_counter_ns()
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            nbytes = (
+                tracemalloc.get_traced_memory()[0] - before
+                if profile.trace_memory
+                else 0
+            )
+            profile.record(name, elapsed, _count_rows(result, args), nbytes)
+
+    return wrapper
+
+
+def _public_functions(module: ModuleType):
+    for attr, obj in vars(module).items():
+        if (
+            not attr.startswith("_")
+            and inspect.isfunction(obj)
+            and obj.__module__ == module.__name__
+        ):
+            yield attr, obj
+
+
+def is_enabled() -> bool:
+    return len(_originals) > 0
+
+
+def enable(trace_memory: bool = False):
+    """
+    开始统计。重复调用只会更新 trace_memory。
+    """
+    global _owns_tracemalloc
+    _profile.trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _owns_tracemalloc = True
+    if is_enabled():
+        return
+    for module in PROFILED_MODULES:
+        for attr, func in list(_public_functions(module)):
+            _originals[(module, attr)] = func
+            name = f"{module.__name__.rsplit('.', 1)[-1]}.{attr}"
+            setattr(module, attr, _wrap(name, func))
+
+
+def disable():
+    """
+    停止统计并恢复原函数，已收集的结果保留，直到 reset()。
+    """
+    global _owns_tracemalloc
+    for (module, attr), func in _originals.items():
+        setattr(module, attr, func)
+    _originals.clear()
+    if _owns_tracemalloc:
+        tracemalloc.stop()
+        _owns_tracemalloc = False
+    _profile.trace_memory = False
+
+
+def reset():
+    _profile.reset()
+
+
+def stats() -> pd.DataFrame:
+    return _profile.to_frame()
+
+
+def report(logger: log.Log | None = None) -> pd.DataFrame:
+    return _profile.report(logger)
+
+
+@contextmanager
+def profiling(trace_memory: bool = False):
+    """
+    只统计 with 块内的调用，返回独立的 Profile，退出时恢复之前的状态。
+    """
+    global _profile
+    was_enabled = is_enabled()
+    previous = _profile
+    previous_trace = previous.trace_memory
+    _profile = Profile(trace_memory=trace_memory)
+    current = _profile
+    enable(trace_memory=trace_memory)
+    try:
+        yield current
+    finally:
+        if not was_enabled:
+            disable()
+        _profile = previous
+        if was_enabled:
+            enable(trace_memory=previous_trace)
@@ -21,4 +21,273 @@ def equal(a,b):
         
         return bool(np.array_equal(a,b,True))
 
-  
\ No newline at end of file
+  
+
+# frames_equal 按块比较原始字节的行数，字节完全相同的块跳过逐元素比较
+BLOCK_ROWS = 1 << 20
+
+ToleranceType = float | dict[str, float]
+
+
+class FrameDiff:
+    """
+    frames_equal 的结果，bool(diff) 为两个 DataFrame 是否相等。
+
+    problems 为结构上的差异(形状、列名、dtype、索引)，
+    counts 为每列不相等的元素个数，mismatches 为每列前 N 个不相等的位置，
+    列为 position、index、left、right。
+    """
+
+    def __init__(self):
+        self.problems: list[str] = []
+        self.counts: dict[str, int] = {}
+        self.mismatches: dict[str, pd.DataFrame] = {}
+
+    @property
+    def equal(self) -> bool:
+        return not self.problems and not self.counts
+
+    def __bool__(self) -> bool:
+        return self.equal
+
+    def __str__(self) -> str:
+        if self.equal:
+            return "frames are equal"
+        lines = ["frames differ:"]
+        lines.extend(f"  {p}" for p in self.problems)
+        for col, count in self.counts.items():
+            lines.append(f"  column {col!r}: {count} mismatches")
+            table = self.mismatches[col].to_string(index=False)
+            lines.extend(f"    {line}" for line in table.splitlines())
+        return "\n".join(lines)
+
+    __repr__ = __str__
+
+
+def _raw_view(values: np.ndarray) -> np.ndarray:
+    """按原始字节比较用的无符号整数视图，NaN 的比较结果与字节一致"""
+    values = np.ascontiguousarray(values)
+    if values.dtype.itemsize in (1, 2, 4, 8):
+        return values.view(f"u{values.dtype.itemsize}")
+    return values.view(np.uint8).reshape(len(values), -1)
+
+
+# 时间单位从粗到细
+_TIME_UNITS = ("s", "ms", "us", "ns")
+
+
+def _time_unit(s: pd.Series | pd.Index) -> str | None:
+    dtype = s.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return dtype.unit
+    if isinstance(dtype, np.dtype) and dtype.kind in "mM":
+        return np.datetime_data(dtype)[0]
+    return None
+
+
+def _as_comparable(
+    s: pd.Series | pd.Index, unit: str | None = None
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    转为可以向量化比较的 (numpy 数组, 缺失值掩码)：时间转为 unit 单位的 int64，
+    带时区的时间为 UTC；可空的整数 / 布尔扩展类型转为原始整数(NA 处为 0)并返回 NA 掩码，
+    不经过 float64，超过 2**53 的整数不会丢失精度；
+    可空的浮点扩展类型转为 float64 (NA -> NaN)，其余转为 object。
+    不需要掩码时掩码为 None。
+    """
+    dtype = s.dtype
+    if dtype.kind in "mM":
+        values = s.array if isinstance(s, pd.Series) else s
+        if unit is not None:
+            values = values.as_unit(unit)
+        return values.asi8, None
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufc":
+        return s.to_numpy(), None
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in "biu":
+        numpy_dtype = getattr(dtype, "numpy_dtype", np.dtype(np.int64))
+        na = np.asarray(s.isna())
+        return s.to_numpy(dtype=numpy_dtype, na_value=numpy_dtype.type(0)), na
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind == "f":
+        return s.to_numpy(dtype=np.float64, na_value=np.nan), None
+    return s.to_numpy(dtype=object), None
+
+
+def _mismatch_mask(
+    left: np.ndarray, right: np.ndarray, rtol: float, atol: float
+) -> np.ndarray:
+    if left.dtype.kind in "fc" or right.dtype.kind in "fc":
+        return ~np.isclose(left, right, rtol=rtol, atol=atol, equal_nan=True)
+    if left.dtype.kind in "biu" and right.dtype.kind in "biu":
+        return left != right
+    if left.dtype == object or right.dtype == object:
+        left = left.astype(object, copy=False)
+        right = right.astype(object, copy=False)
+        same = left == right
+        if not isinstance(same, np.ndarray):
+            same = np.array([l == r for l, r in zip(left, right)], dtype=bool)
+        return ~(same | (pd.isna(left) & pd.isna(right)))
+    return left != right
+
+
+def _display(s: pd.Series | pd.Index, positions: list[int]) -> np.ndarray:
+    """差异报告中的值，取自原始的 Series / Index，时间显示为 Timestamp，缺失值为 NA"""
+    return np.asarray(s.take(positions), dtype=object)
+
+
+def _compare_values(
+    name: str,
+    left_s: pd.Series | pd.Index,
+    right_s: pd.Series | pd.Index,
+    index: pd.Index,
+    rtol: float,
+    atol: float,
+    max_diffs: int,
+    diff: FrameDiff,
+):
+    # 两侧时间单位不同(check_dtype=False)时统一为较细的单位
+    units = [u for u in (_time_unit(left_s), _time_unit(right_s)) if u is not None]
+    unit = max(units, key=_TIME_UNITS.index) if len(set(units)) > 1 else None
+    left, left_na = _as_comparable(left_s, unit)
+    right, right_na = _as_comparable(right_s, unit)
+    n = len(left)
+    if left_na is not None or right_na is not None:
+        # 只有一侧有 NA 掩码时(check_dtype=False)，另一侧的 NaN / None 也视为缺失值
+        left_na = np.asarray(pd.isna(left)) if left_na is None else left_na
+        right_na = np.asarray(pd.isna(right)) if right_na is None else right_na
+    block_rows = max(min(BLOCK_ROWS, n), 1)
+    if left.dtype == right.dtype and left.dtype != object:
+        # 先按块比较原始字节，只对字节不同的块做带误差、NaN 相等的逐元素比较
+        raw_left, raw_right = _raw_view(left), _raw_view(right)
+        blocks = [
+            i
+            for i in range(math.ceil(n / block_rows))
+            if not np.array_equal(
+                raw_left[i * block_rows : (i + 1) * block_rows],
+                raw_right[i * block_rows : (i + 1) * block_rows],
+            )
+            or (
+                left_na is not None
+                and not np.array_equal(
+                    left_na[i * block_rows : (i + 1) * block_rows],
+                    right_na[i * block_rows : (i + 1) * block_rows],
+                )
+            )
+        ]
+    else:
+        blocks = range(math.ceil(n / block_rows))
+
+    positions = []
+    count = 0
+    for b in blocks:
+        start = b * block_rows
+        stop = min(start + block_rows, n)
+        mask = _mismatch_mask(left[start:stop], right[start:stop], rtol, atol)
+        if left_na is not None:
+            # 两侧都缺失视为相等，只有一侧缺失视为不等
+            na_l, na_r = left_na[start:stop], right_na[start:stop]
+            mask = (mask & ~(na_l & na_r)) | (na_l != na_r)
+        found = np.flatnonzero(mask)
+        count += len(found)
+        if len(positions) < max_diffs:
+            positions.extend((found[: max_diffs - len(positions)] + start).tolist())
+    if count == 0:
+        return
+    diff.counts[name] = count
+    diff.mismatches[name] = pd.DataFrame(
+        {
+            "position": positions,
+            "index": index[positions],
+            "left": _display(left_s, positions),
+            "right": _display(right_s, positions),
+        }
+    )
+
+
+def frames_equal(
+    a: pd.DataFrame,
+    b: pd.DataFrame,
+    rtol: ToleranceType = 1e-05,
+    atol: ToleranceType = 1e-08,
+    check_dtype: bool = True,
+    check_index: bool = True,
+    max_diffs: int = 10,
+) -> FrameDiff:
+    """
+    按列向量化比较两个 DataFrame，NaN / NaT / None 视为相等。
+
+    :param rtol: 相对误差，可以是 {列名: 误差} 的字典，未列出的列使用 np.isclose 的默认值
+    :param atol: 绝对误差，同 rtol。误差只作用于浮点列，整数、时间、字符串列要求完全相等
+    :param check_dtype: 是否要求每列的 dtype 相同，为 False 时只比较值
+    :param check_index: 是否比较索引，为 False 时按位置比较
+    :param max_diffs: 每列最多记录的不相等位置数
+    :return: FrameDiff，bool(result) 为是否相等，str(result) 为差异报告
+
+    同 dtype 的列先按块比较原始字节，完全相同的块不再做带误差的逐元素比较。
+    """
+    diff = FrameDiff()
+    if len(a) != len(b):
+        diff.problems.append(f"length differs: {len(a)} != {len(b)}")
+        return diff
+
+    if not a.columns.equals(b.columns):
+        missing = a.columns.difference(b.columns).tolist()
+        extra = b.columns.difference(a.columns).tolist()
+        if missing or extra:
+            diff.problems.append(
+                f"columns differ: only left {missing}, only right {extra}"
+            )
+        else:
+            diff.problems.append("column order differs")
+    columns = [c for c in a.columns if c in b.columns]
+
+    index = a.index
+    if check_index:
+        _compare_index(a.index, b.index, check_dtype, max_diffs, diff)
+    else:
+        index = pd.RangeIndex(len(a))
+
+    def tolerance(tol: ToleranceType, col, default: float) -> float:
+        return tol.get(col, default) if isinstance(tol, dict) else tol
+
+    for col in columns:
+        left, right = a[col], b[col]
+        if check_dtype and left.dtype != right.dtype:
+            diff.problems.append(
+                f"dtype of column {col!r} differs: {left.dtype} != {right.dtype}"
+            )
+            continue
+        _compare_values(
+            str(col),
+            left,
+            right,
+            index,
+            tolerance(rtol, col, 1e-05),
+            tolerance(atol, col, 1e-08),
+            max_diffs,
+            diff,
+        )
+    return diff
+
+
+def _compare_index(
+    left: pd.Index, right: pd.Index, check_dtype: bool, max_diffs: int, diff: FrameDiff
+):
+    if left.names != right.names:
+        diff.problems.append(f"index names differ: {left.names} != {right.names}")
+    if check_dtype and left.dtype != right.dtype:
+        diff.problems.append(f"index dtype differs: {left.dtype} != {right.dtype}")
+        return
+    if left.equals(right):
+        return
+    if isinstance(left, pd.MultiIndex) or isinstance(right, pd.MultiIndex):
+        left, right = left.to_flat_index(), right.to_flat_index()
+    _compare_values(
+        "<index>",
+        left,
+        right,
+        pd.RangeIndex(len(left)),
+        0.0,
+        0.0,
+        max_diffs,
+        diff,
+    )
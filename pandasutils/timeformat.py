@@ -1,6 +1,16 @@
-import pandas as pd
+from __future__ import annotations
 
-from .type import DatetimeType, TimedeltaType
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+# numpy / pandas 在第一次格式化时才导入，import timeformat 本身不依赖它们
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+    from .type import DatetimeType
 
 
 class TimeFormat:
@@ -192,6 +202,8 @@ class TimeFormat:
     """
 
     def __init__(self, datetime: DatetimeType):
+        import pandas as pd
+
         self.time: pd.Timestamp = pd.to_datetime(datetime)
 
     def yymmdd(self, join="-"):
@@ -223,6 +235,143 @@ class TimeFormat:
     def DT(cls, datej="-", join=" ", timej=":"):
         return f"{cls.YYMMDD(datej)}{join}{cls.HHMMSS(timej)}"
 
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def compile(pattern: str) -> "CompiledTimeFormat":
+        """
+        编译 pattern 为可重复使用的 CompiledTimeFormat，相同 pattern 返回同一对象。
+        """
+        return CompiledTimeFormat(pattern)
+
     # @classmethod
     # def dt(cls, datej="-", join=" ", timej=":"):
     #     return f"{cls.YYMD(datej)}{join}{cls.HMS(timej)}"
+
+
+# 定宽数字格式码: 宽度, 以及从 DatetimeIndex 提取整数字段的函数
+_FIXED_WIDTH_CODES = {
+    "%Y": (4, lambda idx: idx.year),
+    "%y": (2, lambda idx: idx.year % 100),
+    "%m": (2, lambda idx: idx.month),
+    "%d": (2, lambda idx: idx.day),
+    "%H": (2, lambda idx: idx.hour),
+    "%M": (2, lambda idx: idx.minute),
+    "%S": (2, lambda idx: idx.second),
+    "%f": (6, lambda idx: idx.microsecond),
+}
+
+_CODE_PATTERN = re.compile(r"%-?.")
+
+
+@lru_cache(maxsize=1)
+def _digit_pairs() -> np.ndarray:
+    """0-99 对应的两位 ASCII 数字"""
+    import numpy as np
+
+    return np.array([[48 + i // 10, 48 + i % 10] for i in range(100)], np.uint8)
+
+
+class CompiledTimeFormat:
+    """
+    预编译的时间格式化器，由 TimeFormat.compile(pattern) 创建，可重复使用。
+
+    pattern 只包含定宽数字格式码 (%Y %y %m %d %H %M %S %f) 和字面字符时，
+    整列时间通过整数字段提取和字节缓冲区拼接一次性完成格式化；
+    包含 %a、%B 等本地化格式码时，退回逐元素 strftime。
+
+    >>> fmt = TimeFormat.compile(TimeFormat.DT())
+    >>> fmt(pd.Series(pd.date_range("2024-01-01", periods=2, freq="h")))
+    0    2024-01-01 00:00:00
+    1    2024-01-01 01:00:00
+    dtype: object
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        # (字面字节, None) 或 (格式码, 宽度)
+        self._segments: list[tuple[bytes, None] | tuple[str, int]] = []
+        self.vectorized = True
+        pos = 0
+        for m in _CODE_PATTERN.finditer(pattern):
+            if m.start() > pos:
+                self._segments.append((pattern[pos : m.start()].encode("utf-8"), None))
+            code = m.group()
+            if code == "%%":
+                self._segments.append((b"%", None))
+            elif code in _FIXED_WIDTH_CODES:
+                self._segments.append((code, _FIXED_WIDTH_CODES[code][0]))
+            else:
+                self.vectorized = False
+            pos = m.end()
+        if pos < len(pattern):
+            self._segments.append((pattern[pos:].encode("utf-8"), None))
+        if "\0" in pattern:
+            self.vectorized = False
+        self.width = sum(
+            len(seg) if width is None else width for seg, width in self._segments
+        )
+
+    def __repr__(self):
+        return f"CompiledTimeFormat({self.pattern!r}, vectorized={self.vectorized})"
+
+    def __call__(self, times):
+        """
+        格式化单个时间或一组时间。
+
+        参数:
+        - times: 单个时间 (datetime, pd.Timestamp, np.datetime64, str)，
+          或 pd.Series、pd.Index、np.ndarray、list 等序列。
+
+        返回:
+        - 单个时间返回 str；pd.Series 返回索引相同的 pd.Series；
+          其余序列返回 object 类型的 np.ndarray。NaT 位置为 None。
+        """
+        import numpy as np
+        import pandas as pd
+
+        if isinstance(times, (str, datetime, np.datetime64)):
+            return pd.Timestamp(times).strftime(self.pattern)
+        if isinstance(times, pd.Series):
+            values = self.format_array(times)
+            return pd.Series(values, index=times.index, name=times.name, dtype=object)
+        return self.format_array(times)
+
+    def format_array(self, times) -> np.ndarray:
+        import numpy as np
+        import pandas as pd
+
+        idx = pd.DatetimeIndex(pd.to_datetime(times))
+        if not self.vectorized:
+            return np.asarray(
+                [None if t is pd.NaT else t.strftime(self.pattern) for t in idx],
+                dtype=object,
+            )
+
+        n = len(idx)
+        nat = idx.isna()
+        if nat.any():
+            idx = idx.fillna(pd.Timestamp(0, tz=idx.tz))
+        # 每行末尾多留一个 \0 作为分隔符，整块解码后一次 split 得到全部字符串
+        buf = np.empty((n, self.width + 1), dtype=np.uint8)
+        buf[:, self.width] = 0
+        offset = 0
+        digit_pairs = _digit_pairs()
+        for seg, width in self._segments:
+            if width is None:
+                buf[:, offset : offset + len(seg)] = np.frombuffer(seg, dtype=np.uint8)
+                offset += len(seg)
+                continue
+            values = np.asarray(_FIXED_WIDTH_CODES[seg][1](idx), dtype=np.int64)
+            # 定宽字段的宽度都是偶数，每次查表写入两位数字
+            for end in range(offset + width, offset, -2):
+                buf[:, end - 2 : end] = digit_pairs[values % 100]
+                values = values // 100
+            offset += width
+
+        texts = buf.tobytes().decode("utf-8").split("\0")
+        texts.pop()
+        result = np.empty(n, dtype=object)
+        result[:] = texts
+        if nat.any():
+            result[nat] = None
+        return result
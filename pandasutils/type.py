@@ -1,36 +1,74 @@
-import sys
 from collections.abc import MutableSequence, Sequence
 from datetime import datetime, timedelta
-from typing import Any, TypeAlias, TypeVar
+from typing import TYPE_CHECKING, Any, TypeAlias, TypeVar
 
-import numpy as np
-import pandas as pd
-from numpy.typing import NDArray
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from numpy.typing import NDArray
 
-DatetimeType: TypeAlias = datetime | np.datetime64 | pd.Timestamp
+    DatetimeType: TypeAlias = datetime | np.datetime64 | pd.Timestamp
 
-TimedeltaType: TypeAlias = timedelta | np.timedelta64 | pd.Timedelta
+    TimedeltaType: TypeAlias = timedelta | np.timedelta64 | pd.Timedelta
 
-SequenceType: TypeAlias = MutableSequence | Sequence | NDArray
+    SequenceType: TypeAlias = MutableSequence | Sequence | NDArray
 
+    T = TypeVar(
+        "T",
+        str,
+        int,
+        float,
+        np.number,
+        datetime,
+        timedelta,
+        np.datetime64,
+        np.timedelta64,
+        pd.Timestamp,
+        pd.Timedelta,
+        Any,
+    )
 
-T = TypeVar(
+    SequenceGenericType: TypeAlias = MutableSequence[T] | Sequence[T] | np.ndarray
+
+
+_LAZY_NAMES = (
+    "DatetimeType",
+    "TimedeltaType",
+    "SequenceType",
     "T",
-    str,
-    int,
-    float,
-    np.number,
-    datetime,
-    timedelta,
-    np.datetime64,
-    np.timedelta64,
-    pd.Timestamp,
-    pd.Timedelta,
-    Any,
+    "SequenceGenericType",
 )
 
 
-if sys.version_info < (3, 10):
-    SequenceGenericType: TypeAlias = "Union[MutableSequence[T], Sequence[T],NDArray]"
-else:
-    SequenceGenericType: TypeAlias = MutableSequence[T] | Sequence[T] | np.ndarray
+def __getattr__(name: str):
+    """
+    类型别名依赖 numpy / pandas，第一次访问时才导入并创建，定义与上面 TYPE_CHECKING 中的一致。
+    """
+    if name not in _LAZY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import numpy as np
+    import pandas as pd
+    from numpy.typing import NDArray
+
+    T = TypeVar(
+        "T",
+        str,
+        int,
+        float,
+        np.number,
+        datetime,
+        timedelta,
+        np.datetime64,
+        np.timedelta64,
+        pd.Timestamp,
+        pd.Timedelta,
+        Any,
+    )
+    globals().update(
+        DatetimeType=datetime | np.datetime64 | pd.Timestamp,
+        TimedeltaType=timedelta | np.timedelta64 | pd.Timedelta,
+        SequenceType=MutableSequence | Sequence | NDArray,
+        T=T,
+        SequenceGenericType=MutableSequence[T] | Sequence[T] | np.ndarray,
+    )
+    return globals()[name]